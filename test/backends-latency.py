@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# side-by-side latency of wizarddes backends on live display
+# usage: ./backends-latency.py [rounds]
+import sys, importlib.util
+from time import perf_counter
+from pathlib import Path
+
+def load_wizarddes():
+    # module creates default windows manager on import, so pick first one, which can be created
+    for backend in ['xlib', 'xcb', 'wmctrl']:
+        sys.argv = ['wizarddes', '--backend', backend]
+        spec = importlib.util.spec_from_file_location('wizarddes', Path(__file__).resolve().parent.parent / 'wizarddes.py')
+        module = importlib.util.module_from_spec(spec)
+        try:
+            spec.loader.exec_module(module)
+            return module
+        except SystemExit:
+            continue
+    raise RuntimeError("No available backends")
+
+def measure(func, rounds):
+    timings = list()
+    for _ in range(0, rounds):
+        start = perf_counter()
+        func()
+        timings.append((perf_counter() - start) * 1000)
+    timings.sort()
+    return timings
+
+rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+wizarddes = load_wizarddes()
+results = list()
+for backend in wizarddes.WINDOWS_MANAGERS:
+    try:
+        manager = wizarddes.create_windows_manager(backend)
+    except wizarddes.NotAvailableOperatioException as ex:
+        print(f"Skipping '{backend}': {ex}")
+        continue
+    operations = {
+        'windows (all fields)' : lambda: manager.get_windows_list(),
+        'windows (ids only)' : lambda: manager.get_windows_list([]),
+        'desktops' : lambda: manager.get_desktops_list()
+    }
+    windows_count = len(manager.get_windows_list([]))
+    for operation, func in operations.items():
+        timings = measure(func, rounds)
+        results.append({
+            'backend' : backend,
+            'operation' : operation,
+            'windows' : windows_count,
+            'min, ms' : f"{timings[0]:.2f}",
+            'median, ms' : f"{timings[len(timings) // 2]:.2f}",
+            'max, ms' : f"{timings[-1]:.2f}"
+        })
+
+wizarddes.PrintUtil.TableFormater(results).print_table()
@@ -0,0 +1,26 @@
+import os, sys, tempfile, importlib.util
+from pathlib import Path
+
+module = None
+
+# module parses arguments and creates windows manager on import, so tests use `wmctrl` backend
+# with no-op `wmctrl` in PATH and temporary home, nothing is sent to X Server
+def load_wizarddes():
+    global module
+    if module is not None:
+        return module
+    home = tempfile.mkdtemp(prefix='wizarddes-test-')
+    wmctrl = os.path.join(home, 'wmctrl')
+    with open(wmctrl, 'w') as script:
+        script.write("#!/bin/sh\nexit 0\n")
+    os.chmod(wmctrl, 0o755)
+    os.environ['PATH'] = home + os.pathsep + os.environ.get('PATH', '')
+    os.environ['HOME'] = home
+    argv, sys.argv = sys.argv, ['wizarddes', '--backend', 'wmctrl']
+    try:
+        spec = importlib.util.spec_from_file_location('wizarddes', Path(__file__).resolve().parent.parent / 'wizarddes.py')
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        sys.argv = argv
+    return module
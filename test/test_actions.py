@@ -0,0 +1,115 @@
+import unittest
+from helpers import load_wizarddes
+
+wizarddes = load_wizarddes()
+ActionsBuffer, FilterObject, DataFilters = wizarddes.ActionsBuffer, wizarddes.FilterObject, wizarddes.DataFilters
+
+# actions applied by buffer, in order
+class RecordingManager(wizarddes.WindowsManager):
+    def __init__(self):
+        super().__init__()
+        self.actions = []
+
+    def mv_to(self, window_id, desktop_id):
+        self.actions.append(('mv_to', window_id, desktop_id))
+
+    def close(self, window_id):
+        self.actions.append(('close', window_id))
+
+class ActionsBufferTest(unittest.TestCase):
+    def setUp(self):
+        self.manager, wizarddes.windows_manager = wizarddes.windows_manager, RecordingManager()
+
+    def tearDown(self):
+        wizarddes.windows_manager = self.manager
+
+    def actions(self):
+        return wizarddes.windows_manager.actions
+
+    def test_not_buffered_applied_immediately(self):
+        buffer = ActionsBuffer(False)
+        buffer.mv_to(0x100, 1)
+        buffer.close(0x101)
+        self.assertEqual(self.actions(), [ ('mv_to', 0x100, 1), ('close', 0x101) ])
+        self.assertEqual(buffer.pending, {})
+
+    def test_buffered_till_commit(self):
+        buffer = ActionsBuffer(True)
+        buffer.mv_to(0x100, 1)
+        buffer.close(0x101)
+        self.assertEqual(self.actions(), [])
+        buffer.commit('test')
+        self.assertEqual(self.actions(), [ ('mv_to', 0x100, 1), ('close', 0x101) ])
+        self.assertEqual((buffer.pending, buffer.coalesced), ({}, 0))
+
+    def test_last_move_wins(self):
+        buffer = ActionsBuffer(True)
+        for desktop_id in [ 1, 2, 3 ]:
+            buffer.mv_to(0x100, desktop_id)
+        self.assertEqual(buffer.coalesced, 2)
+        buffer.commit('test')
+        self.assertEqual(self.actions(), [ ('mv_to', 0x100, 3) ])
+
+    def test_close_cancels_moves(self):
+        buffer = ActionsBuffer(True)
+        buffer.mv_to(0x100, 1)
+        buffer.close(0x100)
+        buffer.mv_to(0x100, 2)
+        self.assertEqual(buffer.coalesced, 2)
+        buffer.commit('test')
+        self.assertEqual(self.actions(), [ ('close', 0x100) ])
+
+    def test_commit_without_actions(self):
+        buffer = ActionsBuffer(True)
+        buffer.commit('test')
+        self.assertEqual(self.actions(), [])
+
+    def test_reading_desktops_commits_moves(self):
+        buffer = ActionsBuffer(True)
+        buffer.mv_to(0x100, 1)
+        buffer.before_read([ 'windowTitle' ], 'test')
+        self.assertEqual(self.actions(), [])
+        buffer.before_read([ 'desktopId' ], 'test')
+        self.assertEqual(self.actions(), [ ('mv_to', 0x100, 1) ])
+
+    def test_closes_wait_for_scenario_end(self):
+        buffer = ActionsBuffer(True)
+        buffer.close(0x100)
+        buffer.before_read([ 'desktopId' ], 'test')
+        self.assertEqual(self.actions(), [])
+        self.assertEqual(buffer.filters()[0].filter_value, { 0x100 })
+
+class NotClosedFilterTest(unittest.TestCase):
+    def setUp(self):
+        wizarddes.windows_manager.snapshot_size = None
+
+    def test_no_filter_without_closes(self):
+        buffer = ActionsBuffer(True)
+        buffer.mv_to(0x100, 1)
+        self.assertEqual(buffer.filters(), [])
+
+    def test_selectivity_by_windows_count(self):
+        buffer = ActionsBuffer(True)
+        wizarddes.windows_manager.snapshot_size = 10
+        buffer.close(0x100)
+        buffer.close(0x101)
+        [ filter_object ] = buffer.filters()
+        self.assertEqual(filter_object.filter_value, { 0x100, 0x101 })
+        self.assertAlmostEqual(filter_object.selectivity, 0.8)
+
+    def test_most_windows_pass_by_default(self):
+        buffer = ActionsBuffer(True)
+        buffer.close(0x100)
+        [ filter_object ] = buffer.filters()
+        self.assertGreater(filter_object.selectivity, 0.5)
+
+    def test_applied_after_selective_filters(self):
+        buffer = ActionsBuffer(True)
+        wizarddes.windows_manager.snapshot_size = 20
+        buffer.close(0x100)
+        desk_filter = FilterObject(DataFilters.filter_by_desk, 1)
+        snapshot = wizarddes.WindowsSnapshot.from_ids(range(0x100, 0x114), None)
+        self.assertEqual(wizarddes.windows_manager.order_filters(snapshot, buffer.filters() + [ desk_filter ])[0], desk_filter)
+
+if __name__ == '__main__':
+    unittest.main()
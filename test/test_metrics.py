@@ -0,0 +1,95 @@
+import os, re, tempfile, unittest
+from helpers import load_wizarddes
+
+wizarddes = load_wizarddes()
+
+SAMPLE = re.compile(r'(?P<name>[a-zA-Z_:][a-zA-Z0-9_:]*)(?P<labels>\{[^}]*\})? (?P<value>\S+)$')
+
+# same rules, as text parser of node-exporter textfile collector uses: sample belongs to family with same name,
+# histogram samples are family name with `_bucket`, `_sum` or `_count` suffix, other samples become untyped families
+def parse(text):
+    families, family = {}, None
+    for line in text.splitlines():
+        if line.startswith('# TYPE '):
+            _, _, family, metric_type = line.split(' ')
+            families[family] = { 'type' : metric_type, 'samples' : {} }
+            continue
+        if line.startswith('#'):
+            continue
+        match = SAMPLE.match(line)
+        assert match is not None, f"broken line: {line}"
+        name = match['name']
+        suffixes = ('_bucket', '_sum', '_count') if family is not None and families[family]['type'] == 'histogram' else ('',)
+        if family is None or name not in [ family + suffix for suffix in suffixes ]:
+            family = name
+            families.setdefault(family, { 'type' : 'untyped', 'samples' : {} })
+        families[family]['samples'][name + (match['labels'] or '')] = float(match['value'])
+    return families
+
+class MetricsRecorderTest(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(prefix='wizarddes-metrics-'), 'wizarddes.prom')
+
+    def recorder(self, scenario = 'default'):
+        return wizarddes.MetricsRecorder(self.path, scenario)
+
+    def read(self):
+        with open(self.path) as metrics_file:
+            return parse(metrics_file.read())
+
+    def test_counters_typed(self):
+        recorder = self.recorder()
+        recorder.inc('wizarddes_queries_total', status='ok')
+        recorder.write()
+        families = self.read()
+        self.assertEqual(families['wizarddes_queries_total']['type'], 'counter')
+        self.assertEqual(families['wizarddes_queries_total']['samples'], { 'wizarddes_queries_total{scenario="default",status="ok"}' : 1 })
+        self.assertEqual([ family['type'] for family in families.values() if family['type'] == 'untyped' ], [])
+
+    def test_histogram(self):
+        recorder = self.recorder()
+        recorder.observe('wizarddes_scenario_duration_seconds', 0.2)
+        recorder.write()
+        family = self.read()['wizarddes_scenario_duration_seconds']
+        self.assertEqual(family['type'], 'histogram')
+        samples = family['samples']
+        self.assertEqual(samples['wizarddes_scenario_duration_seconds_bucket{scenario="default",le="0.1"}'], 0)
+        self.assertEqual(samples['wizarddes_scenario_duration_seconds_bucket{scenario="default",le="0.25"}'], 1)
+        self.assertEqual(samples['wizarddes_scenario_duration_seconds_bucket{scenario="default",le="+Inf"}'], 1)
+        self.assertEqual(samples['wizarddes_scenario_duration_seconds_count{scenario="default"}'], 1)
+        self.assertAlmostEqual(samples['wizarddes_scenario_duration_seconds_sum{scenario="default"}'], 0.2)
+
+    def test_runs_merged(self):
+        for scenario, duration in [ ('default', 0.2), ('default', 3), ('other', 0.01) ]:
+            recorder = self.recorder(scenario)
+            recorder.inc('wizarddes_queries_total', status='ok')
+            recorder.observe('wizarddes_scenario_duration_seconds', duration)
+            recorder.write()
+        families = self.read()
+        self.assertEqual(families['wizarddes_queries_total']['samples'], {
+            'wizarddes_queries_total{scenario="default",status="ok"}' : 2,
+            'wizarddes_queries_total{scenario="other",status="ok"}' : 1
+        })
+        samples = families['wizarddes_scenario_duration_seconds']['samples']
+        self.assertEqual(samples['wizarddes_scenario_duration_seconds_count{scenario="default"}'], 2)
+        self.assertAlmostEqual(samples['wizarddes_scenario_duration_seconds_sum{scenario="default"}'], 3.2)
+        self.assertEqual(samples['wizarddes_scenario_duration_seconds_bucket{scenario="default",le="2.5"}'], 1)
+
+    def test_unknown_and_broken_lines_dropped(self):
+        with open(self.path, 'w') as metrics_file:
+            metrics_file.write('# TYPE other_total counter\nother_total 5\n# TYPE wizarddes_queries_total counter\nbroken\nwizarddes_queries_total{scenario="default",status="ok"} 2\n')
+        recorder = self.recorder()
+        recorder.inc('wizarddes_queries_total', status='ok')
+        recorder.write()
+        families = self.read()
+        self.assertEqual(list(families), [ 'wizarddes_queries_total' ])
+        self.assertEqual(families['wizarddes_queries_total']['samples'], { 'wizarddes_queries_total{scenario="default",status="ok"}' : 3 })
+
+    def test_label_values_escaped(self):
+        recorder = self.recorder('say "hi"\\')
+        recorder.inc('wizarddes_queries_total', status='ok')
+        recorder.write()
+        self.assertEqual(list(self.read()['wizarddes_queries_total']['samples']), [ 'wizarddes_queries_total{scenario="say \\"hi\\"\\\\",status="ok"}' ])
+
+if __name__ == '__main__':
+    unittest.main()
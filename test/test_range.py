@@ -0,0 +1,98 @@
+import unittest
+from helpers import load_wizarddes
+
+wizarddes = load_wizarddes()
+RangeObject, RangeFilters, FilterObject, DataFilters = wizarddes.RangeObject, wizarddes.RangeFilters, wizarddes.FilterObject, wizarddes.DataFilters
+UNDEFINED = wizarddes.WindowsSnapshot.UNDEFINED
+
+# windowId, desktopId, stacking, recency, geometry
+WINDOWS = [
+    (0x100, 0, 3, UNDEFINED, (0, 0, 10, 10)),
+    (0x101, 1, 0, 0, None),
+    (0x102, 0, 4, 2, (5, 0, 10, 10)),
+    (0x103, 1, 1, UNDEFINED, (0, 5, 10, 10)),
+    (0x104, 0, 2, 1, (0, 0, 5, 5))
+]
+
+def snapshot():
+    snapshot = wizarddes.WindowsSnapshot()
+    for window_id, desktop_id, stacking, recency, geometry in WINDOWS:
+        snapshot.append(window_id, desktop_id, 1000, 'host', f"window {window_id:x}", geometry=geometry, stacking=stacking, recency=recency)
+    return snapshot
+
+# stacking is fetched with windows list, like in xlib and xcb backends
+class FreeStackingManager(wizarddes.WindowsManager):
+    FIELDS_COST = dict(wizarddes.WindowsManager.FIELDS_COST, stacking=0)
+
+class RangeObjectTest(unittest.TestCase):
+    def select(self, range_object):
+        windows = snapshot()
+        return [ windows.ids[index] for index in range_object.select(iter(range(0, len(windows))), windows) ]
+
+    def select_indexes(self, range_object):
+        windows = snapshot()
+        return range_object.select(iter(range(0, len(windows))), windows)
+
+    def test_list_order(self):
+        self.assertEqual(self.select(RangeFilters.filter_all), [ 0x100, 0x101, 0x102, 0x103, 0x104 ])
+        self.assertEqual(self.select(RangeFilters.filter_first), [ 0x100 ])
+        self.assertEqual(self.select(RangeObject(2)), [ 0x100, 0x101 ])
+
+    def test_reverse_without_order(self):
+        # select_windows streams windows reversed for LAST, select() only restores order of taken ones
+        windows = snapshot()
+        self.assertEqual(RangeObject(2, True).select(iter([ 4, 3, 2, 1, 0 ]), windows), [ 3, 4 ])
+
+    def test_order_by(self):
+        self.assertEqual(self.select(RangeObject(None, False, 'stacking')), [ 0x101, 0x103, 0x104, 0x100, 0x102 ])
+        self.assertEqual(self.select(RangeObject(None, False, 'stacking', True)), [ 0x102, 0x100, 0x104, 0x103, 0x101 ])
+
+    def test_top_k(self):
+        self.assertEqual(self.select(RangeObject(2, False, 'stacking')), [ 0x101, 0x103 ])
+        self.assertEqual(self.select(RangeObject(2, False, 'stacking', True)), [ 0x102, 0x100 ])
+
+    def test_last_with_order(self):
+        # last windows of ordered list, in list order
+        self.assertEqual(self.select(RangeObject(1, True, 'stacking')), [ 0x102 ])
+        self.assertEqual(self.select(RangeObject(2, True, 'stacking')), [ 0x100, 0x102 ])
+        self.assertEqual(self.select(RangeObject(2, True, 'stacking', True)), [ 0x103, 0x101 ])
+
+    def test_undefined_recency_last(self):
+        self.assertEqual(self.select(RangeFilters.filter_recent), [ 0x101 ])
+        self.assertEqual(self.select(RangeObject(None, False, 'recency')), [ 0x101, 0x104, 0x102, 0x100, 0x103 ])
+
+    def test_unknown_geometry_first(self):
+        self.assertEqual(self.select(RangeObject(2, False, 'geometry')), [ 0x101, 0x104 ])
+
+    # presorted stream, taken by select_windows for free order fields, gives same windows
+    def test_ordered_same_as_top_k(self):
+        windows = snapshot()
+        for range_object in [ RangeObject(2, False, 'stacking'), RangeObject(2, True, 'stacking'), RangeObject(2, False, 'stacking', True), RangeObject(2, True, 'stacking', True) ]:
+            with self.subTest(range_object=str(range_object)):
+                ordered = range_object.ordered(windows, range(0, len(windows)))
+                self.assertEqual(sorted(range_object.select(iter(ordered), windows, presorted=True)), sorted(self.select_indexes(range_object)))
+
+    def test_str(self):
+        self.assertEqual(str(RangeFilters.filter_recent), 'RECENT')
+        self.assertEqual(str(RangeObject(3, True, 'stacking', True)), 'LAST LIMIT(3) ORDER BY(stacking,desc)')
+        self.assertEqual(str(RangeObject(1, True)), 'LAST')
+
+class SelectWindowsTest(unittest.TestCase):
+    def select(self, manager, filters, range_object):
+        return list(manager.select_windows(snapshot(), filters, range_object).ids)
+
+    def test_filters_and_order(self):
+        desk = [ FilterObject(DataFilters.filter_by_desk, 0) ]
+        for manager in [ wizarddes.WindowsManager(), FreeStackingManager() ]:
+            with self.subTest(manager=type(manager).__name__):
+                self.assertEqual(self.select(manager, desk, RangeObject(2, False, 'stacking')), [ 0x104, 0x100 ])
+                self.assertEqual(self.select(manager, desk, RangeObject(1, True, 'stacking')), [ 0x102 ])
+                self.assertEqual(self.select(manager, desk, RangeFilters.filter_last), [ 0x104 ])
+                self.assertEqual(self.select(manager, desk, RangeObject(None, False, 'stacking', True)), [ 0x102, 0x100, 0x104 ])
+
+    def test_empty_result(self):
+        with self.assertRaises(wizarddes.EmptyQueryResult):
+            wizarddes.WindowsManager().select_windows(snapshot(), [ FilterObject(DataFilters.filter_by_desk, 5) ], RangeFilters.filter_first)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from helpers import load_wizarddes
+
+wizarddes = load_wizarddes()
+WindowsSnapshot, SnapshotDiff = wizarddes.WindowsSnapshot, wizarddes.SnapshotDiff
+
+def snapshot(*windows):
+    snapshot = WindowsSnapshot()
+    for window_id, desktop_id, title in windows:
+        snapshot.append(window_id, desktop_id, 1000, 'host', title)
+    return snapshot
+
+class SnapshotDiffTest(unittest.TestCase):
+    def test_same_windows(self):
+        windows = [ (0x100, 0, 'Terminal'), (0x101, 1, 'Firefox') ]
+        diff = SnapshotDiff(snapshot(*windows), snapshot(*reversed(windows)))
+        self.assertFalse(diff)
+        self.assertEqual(diff.changes, {})
+
+    def test_added_removed_modified(self):
+        old = snapshot((0x100, 0, 'Terminal'), (0x101, 1, 'Firefox'), (0x102, 2, 'Music'))
+        new = snapshot((0x101, 3, 'Firefox'), (0x102, 2, 'Music - playing'), (0x103, 0, 'Editor'), (0x100, 0, 'Terminal'))
+        diff = SnapshotDiff(old, new)
+        self.assertTrue(diff)
+        self.assertEqual(list(diff.added.ids), [ 0x103 ])
+        self.assertEqual(list(diff.removed.ids), [])
+        self.assertEqual(list(diff.modified.ids), [ 0x101, 0x102 ])
+        self.assertEqual(diff.changes, { 0x101 : [ 'desktopId' ], 0x102 : [ 'windowTitle' ] })
+        self.assertEqual(list(SnapshotDiff(new, old).removed.ids), [ 0x103 ])
+
+    def test_compared_fields(self):
+        old = snapshot((0x100, 0, 'Terminal'))
+        new = snapshot((0x100, 1, 'Terminal - vim'))
+        self.assertEqual(SnapshotDiff(old, new, [ 'windowTitle' ]).changes, { 0x100 : [ 'windowTitle' ] })
+        self.assertFalse(SnapshotDiff(old, new, []))
+
+    def test_ids_only_diff_loads_nothing(self):
+        loaded = []
+        def loader(field, window_ids):
+            loaded.append(field)
+            return [ 0 ] * len(window_ids)
+        old = WindowsSnapshot.from_ids([ 0x100, 0x101 ], loader)
+        new = WindowsSnapshot.from_ids([ 0x101, 0x102 ], loader)
+        diff = SnapshotDiff(old, new, [])
+        self.assertEqual((list(diff.added.ids), list(diff.removed.ids)), ([ 0x102 ], [ 0x100 ]))
+        self.assertEqual(loaded, [])
+
+if __name__ == '__main__':
+    unittest.main()
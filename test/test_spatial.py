@@ -0,0 +1,48 @@
+import unittest
+from helpers import load_wizarddes
+
+wizarddes = load_wizarddes()
+FilterObject, DataFilters = wizarddes.FilterObject, wizarddes.DataFilters
+
+MONITORS = [ (0, 0, 1920, 1080), (1920, 0, 1920, 1080) ]
+
+def snapshot_with(geometries):
+    snapshot = wizarddes.WindowsSnapshot()
+    for number, geometry in enumerate(geometries):
+        snapshot.append(0x100 + number, 0, 1000 + number, 'host', f"window {number}", geometry=geometry)
+    return snapshot
+
+class SpatialIndexTest(unittest.TestCase):
+    def setUp(self):
+        # left monitor, right monitor, both monitors, outside of monitors, unknown geometry
+        self.snapshot = snapshot_with([ (10, 10, 800, 600), (2000, 10, 800, 600), (1500, 10, 800, 600), (-900, 10, 850, 600), None ])
+        self.index = wizarddes.SpatialIndex(MONITORS)
+
+    def select(self, filter_object, indexes = None):
+        indexes = range(0, len(self.snapshot)) if indexes is None else indexes
+        self.snapshot.spatial_index = self.index
+        return list(filter_object.stream(self.snapshot, iter(indexes)))
+
+    def test_buckets(self):
+        self.select(FilterObject(DataFilters.filter_by_screen, MONITORS[0]))
+        self.assertEqual(self.index.buckets, [ {0, 2}, {1, 2}, {3, 4} ])
+
+    def test_screen(self):
+        self.assertEqual(self.select(FilterObject(DataFilters.filter_by_screen, MONITORS[0])), [0, 2])
+        self.assertEqual(self.select(FilterObject(DataFilters.filter_by_screen, MONITORS[1])), [1])
+
+    def test_area(self):
+        self.assertEqual(self.select(FilterObject(DataFilters.filter_by_area, (-100, 0, 200, 200))), [0, 3])
+        self.assertEqual(self.select(FilterObject(DataFilters.filter_by_area, (1900, 0, 200, 40))), [1, 2])
+
+    def test_only_passed_windows_indexed(self):
+        self.assertEqual(self.select(FilterObject(DataFilters.filter_by_screen, MONITORS[1]), [0, 1]), [1])
+        self.assertEqual(self.index.indexed, {0, 1})
+
+    def test_indexed_windows_of_other_buckets_skipped(self):
+        self.select(FilterObject(DataFilters.filter_by_screen, MONITORS[0]))
+        candidates = self.index.candidates(self.snapshot, iter(range(0, len(self.snapshot))), FilterObject(DataFilters.filter_by_screen, MONITORS[1]))
+        self.assertEqual(list(candidates), [1, 2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+from helpers import load_wizarddes
+
+wizarddes = load_wizarddes()
+
+def tokens(expression):
+    parser = wizarddes.TokenParser.__new__(wizarddes.TokenParser)
+    parser.expression = expression
+    return parser.tokens_list()
+
+class TokensListTest(unittest.TestCase):
+    def test_split_by_spaces(self):
+        self.assertEqual(tokens("FIRST  BY CONTAINS(Firefox) -> MV_TO(1)"), ['FIRST', 'BY', 'CONTAINS(Firefox)', '->', 'MV_TO(1)'])
+
+    def test_spaces_in_value(self):
+        self.assertEqual(tokens("BY FULL(Mozilla Firefox) -> CLOSE"), ['BY', 'FULL(Mozilla Firefox)', '->', 'CLOSE'])
+
+    def test_nested_parentheses(self):
+        self.assertEqual(tokens("FIRST -> WAIT_FOR(FIRST BY CONTAINS(Terminal) BY DESK(2), 10)"), ['FIRST', '->', 'WAIT_FOR(FIRST BY CONTAINS(Terminal) BY DESK(2), 10)'])
+        self.assertEqual(tokens("BY REGEX((Term|Con)sole) -> PRINT"), ['BY', 'REGEX((Term|Con)sole)', '->', 'PRINT'])
+
+    def test_escaped_parentheses(self):
+        self.assertEqual(tokens(r"BY REGEX(Term.*\() -> CLOSE"), ['BY', r'REGEX(Term.*\()', '->', 'CLOSE'])
+        self.assertEqual(tokens(r"BY REGEX(\)\s) -> CLOSE"), ['BY', r'REGEX(\)\s)', '->', 'CLOSE'])
+        # escaped backslash doesn't escape parenthesis after it
+        self.assertEqual(tokens(r"BY REGEX(a\\) -> CLOSE"), ['BY', r'REGEX(a\\)', '->', 'CLOSE'])
+
+    def test_merged_tokens(self):
+        self.assertEqual(tokens("ALL ORDER BY(stacking,desc) BY RECENT(2) -> PRINT"), ['ALL', 'ORDER_BY(stacking,desc)', 'BY_RECENT(2)', '->', 'PRINT'])
+
+    def test_not_closed_parenthesis(self):
+        for expression in [ "BY REGEX(Term.*( -> CLOSE", "BY CONTAINS(Firefox -> CLOSE", r"BY REGEX(a\) -> CLOSE" ]:
+            with self.subTest(expression=expression), self.assertRaises(wizarddes.ParseTokenException):
+                tokens(expression)
+
+    def test_unbalanced_closing_parenthesis(self):
+        for expression in [ "BY REGEX(Term)) -> CLOSE", "FIRST) -> CLOSE" ]:
+            with self.subTest(expression=expression), self.assertRaises(wizarddes.ParseTokenException):
+                tokens(expression)
+
+    def test_text_after_value(self):
+        with self.assertRaises(wizarddes.ParseTokenException):
+            tokens("BY CONTAINS(Firefox)->CLOSE")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,14 +1,21 @@
 #!/usr/bin/env python3
 
-import re, os, argparse, datetime
-from subprocess import Popen, PIPE, check_output, TimeoutExpired
+import re, os, sys, argparse, datetime, json, mmap, hashlib, fcntl, heapq
+from collections import Counter
+from subprocess import Popen, PIPE, TimeoutExpired
 from argparse import RawTextHelpFormatter
-from time import sleep
+from time import sleep, monotonic, time
+from select import select
 from array import array
+from itertools import islice
 from pathlib import Path
 
 local_storage_path = os.path.join(Path.home(),'.wizarddes')
 rules_storage_path = os.path.join(local_storage_path, 'rules')
+layouts_storage_path = os.path.join(local_storage_path, 'layouts')
+snapshot_cache_path = os.path.join(local_storage_path, 'snapshot.cache')
+runs_storage_path = os.path.join(local_storage_path, 'runs')
+recent_windows_path = os.path.join(local_storage_path, 'recent.mru')
 
 # exceptions
 class ParseTokenException(Exception):
@@ -32,11 +39,19 @@ class NotAvailableOperatioException(Exception):
 class TableFormaterException(Exception):
     pass
 
+class DeadlineExceeded(Exception):
+    pass
+
 # main script utils
 
 # well, wmctrl sometimes don't execute immediately tasks range, so we need give it a little bit of time...
+ACTION_DELAY = 0.05
+
 def wait():
-    sleep(0.05)
+    sleep(ACTION_DELAY)
+
+# minimal seconds between redraws of live tables
+LIVE_REFRESH_INTERVAL = 0.25
 
 class PrintUtil:
     class Colors:
@@ -99,6 +114,10 @@ class PrintUtil:
 
 
         def print_table(self):
+            for line in self.lines():
+                print(line)
+
+        def lines(self):
             def format_line(values, left_separator, right_separator, middle_separator, space_char = self.SPACE):
                 line = ""
                 for index, value in enumerate(values):
@@ -106,7 +125,9 @@ class PrintUtil:
                     indent_before = int(diff/2)
                     indent_after = diff - int(diff/2)
                     
-                    if index == 0:
+                    if index == 0 and len(values) == 1:
+                        chunck = f"{left_separator}{space_char*(indent_before + 1)}{value}{space_char*(indent_after + 1)}{right_separator}"
+                    elif index == 0:
                         indent_before += 1
                         chunck = f"{left_separator}{space_char*indent_before}{value}{space_char*indent_after}"
                     elif index == (len(values) - 1):
@@ -124,17 +145,60 @@ class PrintUtil:
 
             width_with_indents = full_width + (self.columns*2 - self.columns - 1)
             # top line
-            print(f"{self.TOP_LEFT}{self.HORIZONTAL*width_with_indents}{self.TOP_RIGHT}")
+            lines = [ f"{self.TOP_LEFT}{self.HORIZONTAL*width_with_indents}{self.TOP_RIGHT}" ]
             # headers
-            print(headers_line)
+            lines.append(headers_line)
             delimiter = f"{self.TRANSITION_LEFT}{self.HORIZONTAL*width_with_indents}{self.TRANSITION_RIGHT}"
-            print(delimiter)
+            lines.append(delimiter)
             for index, obj in enumerate(self.data):
                 line = format_line(obj.values(), self.VERTICAL, self.VERTICAL, self.VERTICAL)
-                print(line)
-                index < (len(self.data) - 1) and print(delimiter)
+                lines.append(line)
+                index < (len(self.data) - 1) and lines.append(delimiter)
             # bottom line
-            print(f"{self.BOTTOM_LEFT}{self.HORIZONTAL*width_with_indents}{self.BOTTOM_RIGTH}")
+            lines.append(f"{self.BOTTOM_LEFT}{self.HORIZONTAL*width_with_indents}{self.BOTTOM_RIGTH}")
+            return lines
+
+    # table, which stays on screen, cursor is kept right under it
+    # only changed lines are rewritten, whole table only when its height changed
+    class LiveTable():
+        EMPTY = '(nothing to show)'
+
+        def __init__(self):
+            self.lines = list()
+
+        # returns number of rewritten lines
+        def update(self, data):
+            lines = PrintUtil.TableFormater(data).lines() if data else [ self.EMPTY ]
+            height = len(self.lines)
+            output = list()
+            if len(lines) != height:
+                # to first column of table top, then clear everything below
+                height and output.append(f"\033[{height}F")
+                output.append("\033[J")
+                output += [ f"{line}\n" for line in lines ]
+                changed = len(lines)
+            else:
+                changed = 0
+                for index, (old_line, line) in enumerate(zip(self.lines, lines)):
+                    if old_line != line:
+                        output.append(f"\033[{height - index}F{line}\033[K\033[{height - index}E")
+                        changed += 1
+            self.lines = lines
+            sys.stdout.write(''.join(output))
+            sys.stdout.flush()
+            return changed
+
+    # tokens output in `--format`, chosen by user
+    @staticmethod
+    def print_rows(rows):
+        if options.format == 'json':
+            print(json.dumps(rows), file=rows_output)
+        elif options.format == 'tsv':
+            rows and print('\t'.join(rows[0].keys()), file=rows_output)
+            for row in rows:
+                print('\t'.join(str(value) for value in row.values()), file=rows_output)
+        else:
+            PrintUtil.TableFormater(rows).print_table()
 
     @staticmethod
     def log_error(msg):
@@ -167,6 +231,7 @@ class PrintUtil:
 
         def pretty_dict(d, indent=0):
             for key, value in d.items():
+                value = value.to_dicts(False) if isinstance(value, WindowsSnapshot) else value
                 color_print(f"{PrintUtil.indent_symbol * indent}{key}:", end='')
                 if isinstance(value, dict):
                     print()
@@ -187,6 +252,7 @@ class PrintUtil:
                     color_print(f"{PrintUtil.indent_symbol*(indent+1)}{value}")
 
         def pretty_print(obj):
+            obj = obj.to_dicts(False) if isinstance(obj, WindowsSnapshot) else obj
             if isinstance(obj, dict):
                 pretty_dict(obj)
             elif isinstance(obj, list):
@@ -198,19 +264,34 @@ class PrintUtil:
 
 # query parser logic
 class Tokens:
-    ALL, FIRST, LAST, BY, ID, REGEX, CONTAINS, FULL, CLOSE, MV_SEPARATE, MV_TO, SWITCH, ACTIVE, DESK, CREATE, WAIT, RANGE, FORCE_CREATE, PRINT, PRINT_DESKTOPS = range(20)
+    ALL, FIRST, LAST, BY, ID, REGEX, CONTAINS, FULL, CLOSE, MV_SEPARATE, MV_TO, SWITCH, ACTIVE, DESK, CREATE, WAIT, RANGE, FORCE_CREATE, PRINT, PRINT_DESKTOPS, WAIT_FOR, SAVE_LAYOUT, RESTORE_LAYOUT, PRINT_LIVE, PRINT_DESKTOPS_LIVE, ORDER_BY, LIMIT, COUNT, GROUP_BY, SCREEN, AREA, RECENT, BY_RECENT = range(33)
 
     CONVERSION_OPERATOR = '->' 
     DEFAULT_SCENARIO_TOKEN = '*'
     AND_OPERATOR = '&'
 
-    UNARY_OPERATORS = [SWITCH]
+    UNARY_OPERATORS = [SWITCH, SAVE_LAYOUT, RESTORE_LAYOUT]
 
-    EXECUTABLE = [ALL, FIRST, LAST, ID, REGEX, CONTAINS, FULL, MV_TO, MV_SEPARATE, CLOSE, ACTIVE, SWITCH, DESK, CONVERSION_OPERATOR, CREATE, WAIT, RANGE, FORCE_CREATE, BY, PRINT, PRINT_DESKTOPS] 
-    RANGE_FILTERS = [ALL, FIRST, LAST, RANGE]
-    DATA_FILTERS = [ID, REGEX, CONTAINS, FULL, DESK]
+    EXECUTABLE = [ALL, FIRST, LAST, ID, REGEX, CONTAINS, FULL, MV_TO, MV_SEPARATE, CLOSE, ACTIVE, SWITCH, DESK, CONVERSION_OPERATOR, CREATE, WAIT, RANGE, FORCE_CREATE, BY, PRINT, PRINT_DESKTOPS, WAIT_FOR, SAVE_LAYOUT, RESTORE_LAYOUT, PRINT_LIVE, PRINT_DESKTOPS_LIVE, ORDER_BY, LIMIT, COUNT, GROUP_BY, SCREEN, AREA, RECENT, BY_RECENT] 
+    RANGE_FILTERS = [ALL, FIRST, LAST, RANGE, ORDER_BY, LIMIT, RECENT]
+    DATA_FILTERS = [ID, REGEX, CONTAINS, FULL, DESK, SCREEN, AREA, BY_RECENT]
     SPECIAL_OPERATOR = [CONVERSION_OPERATOR, AND_OPERATOR]
-    TOKENS_WITH_VALUES = [ID, REGEX, CONTAINS, FULL, MV_TO, MV_SEPARATE, DESK, CREATE, FORCE_CREATE, WAIT]
+    TOKENS_WITH_VALUES = [ID, REGEX, CONTAINS, FULL, MV_TO, MV_SEPARATE, DESK, CREATE, FORCE_CREATE, WAIT, WAIT_FOR, ORDER_BY, LIMIT, GROUP_BY, SCREEN, AREA, BY_RECENT]
+    # aggregations of empty selection are zero, not error
+    AGGREGATIONS = [COUNT, GROUP_BY]
+    # after these tokens windows can be changed, so selections of previous queries are outdated
+    MUTATING = [CLOSE, MV_SEPARATE, MV_TO, SWITCH, ACTIVE, CREATE, FORCE_CREATE, WAIT, WAIT_FOR, RESTORE_LAYOUT, PRINT_LIVE, PRINT_DESKTOPS_LIVE]
+    # windows fields, which token reads, other fields are not fetched from windows manager
+    REQUIRED_FIELDS = {
+        ID : ['windowId'],
+        REGEX : ['windowTitle'],
+        CONTAINS : ['windowTitle'],
+        FULL : ['windowTitle'],
+        DESK : ['desktopId'],
+        SCREEN : ['geometry'],
+        AREA : ['geometry'],
+        BY_RECENT : ['recency']
+    }
 
     @staticmethod
     def get(tokenName):
@@ -242,6 +323,9 @@ class Tokens:
         return tokenName != Tokens.CONVERSION_OPERATOR and tokenType == None
 
 class Utils:
+    # _NET_MOVERESIZE_WINDOW flags: static gravity, x/y/width/height present, pager as source
+    MOVERESIZE_FLAGS = 10 | 0xF << 8 | 2 << 12
+
     @staticmethod
     def dict_from_regex(target, reg):
         return [m.groupdict() for m in reg.finditer(target)]
@@ -252,6 +336,31 @@ class Utils:
             state['data_filter_processor'] = list() 
         return state
 
+    # WM_CLASS is "<instance>\0<class>\0", format it like `wmctrl -x` do
+    @staticmethod
+    def format_wm_class(value):
+        return '.'.join(part for part in (value or '').split('\0') if part)
+
+    # position of windows in _NET_CLIENT_LIST_STACKING, bottom to top
+    @staticmethod
+    def stacking_positions(stacking, window_ids):
+        positions = { window_id : position for position, window_id in enumerate(stacking or []) }
+        return [ positions.get(window_id, WindowsSnapshot.UNDEFINED) for window_id in window_ids ]
+
+    # rectangles are (<x>, <y>, <width>, <height>) tuples
+    @staticmethod
+    def rect_contains(rect, x, y):
+        return rect[0] <= x < rect[0] + rect[2] and rect[1] <= y < rect[1] + rect[3]
+
+    @staticmethod
+    def rects_overlap(first, second):
+        return first[0] < second[0] + second[2] and second[0] < first[0] + first[2] and first[1] < second[1] + second[3] and second[1] < first[1] + first[3]
+
+    # window belongs to screen, where its center is
+    @staticmethod
+    def rect_center(rect):
+        return (rect[0] + rect[2] // 2, rect[1] + rect[3] // 2)
+
     @staticmethod
     def to_hex(s):
         def zpad_hex(s):
@@ -268,14 +377,520 @@ class Utils:
         except OSError:
             return False
 
+# windows data stored by columns, ids/desktops/pids in typed arrays, strings in lists
+# values converted to strings only on edges (printing, wmctrl arguments)
+class WindowsSnapshot:
+    # stacking - position in _NET_CLIENT_LIST_STACKING, topmost window has biggest one
+    # recency - position in index of recently focused windows, active window is 0
+    FIELDS = ('windowId', 'desktopId', 'pid', 'client', 'windowTitle', 'wmClass', 'geometry', 'stacking', 'recency')
+    # fields shown by PRINT, others fetched only by tokens, which use them
+    PRINTED_FIELDS = FIELDS[:5]
+    # fields stored in own properties of window, so their changes are reported by PropertyNotify of window
+    WATCHED_FIELDS = ('desktopId', 'pid', 'client', 'windowTitle', 'wmClass')
+    TYPECODES = {
+        'windowId' : 'L',
+        'desktopId' : 'q',
+        'pid' : 'q',
+        'stacking' : 'q',
+        'recency' : 'q'
+    }
+    # value for int fields, if window don't have property
+    UNDEFINED = -1
+
+    # loader(field, window_ids) must return list of values for not yet fetched fields
+    def __init__(self, loader = None):
+        self.columns = { field : (array(self.TYPECODES[field]) if field in self.TYPECODES else list()) for field in self.FIELDS }
+        self.loader = loader
+        # <field> : bytearray, where 1 means, that row value is not fetched yet
+        self.not_loaded = {}
+        # snapshot, which rows are taken, and their positions in it, values are fetched through it
+        self.parent = None
+        self.parent_positions = None
+        # SpatialIndex, created by windows manager for first region filter, rows of snapshot don't change
+        self.spatial_index = None
+
+    # snapshot with ids only, other fields fetched on first access
+    @staticmethod
+    def from_ids(window_ids, loader):
+        snapshot = WindowsSnapshot(loader)
+        snapshot.ids.extend(list(window_ids))
+        for field in WindowsSnapshot.FIELDS[1:]:
+            snapshot.columns[field].extend([ WindowsSnapshot.empty_value(field) ] * len(snapshot.ids))
+            snapshot.not_loaded[field] = bytearray(b'\x01') * len(snapshot.ids)
+        return snapshot
+
+    # geometry is (<x>, <y>, <width>, <height>) tuple or None
+    @staticmethod
+    def empty_value(field):
+        if field in WindowsSnapshot.TYPECODES:
+            return WindowsSnapshot.UNDEFINED
+        return None if field == 'geometry' else ''
+
+    @property
+    def ids(self):
+        return self.columns['windowId']
+
+    @property
+    def desktops(self):
+        return self.column('desktopId')
+
+    @property
+    def pids(self):
+        return self.column('pid')
+
+    @property
+    def clients(self):
+        return self.column('client')
+
+    @property
+    def titles(self):
+        return self.column('windowTitle')
+
+    def loaded_fields(self):
+        return [ field for field in self.FIELDS if field not in self.not_loaded ]
+
+    # fetch not loaded values of fields in one loader call per field, for all rows or only given positions
+    def load(self, fields, positions = None):
+        for field in fields:
+            if field not in self.not_loaded:
+                continue
+            flags = self.not_loaded[field]
+            indexes = [ index for index in (range(0, len(flags)) if positions is None else positions) if flags[index] ]
+            if positions is None:
+                del self.not_loaded[field]
+            else:
+                for index in indexes:
+                    flags[index] = 0
+            if len(indexes) == 0:
+                continue
+            column = self.columns[field]
+            for index, value in zip(indexes, self.fetch(field, indexes)):
+                column[index] = value
+
+    def column(self, field):
+        self.load([ field ])
+        return self.columns[field]
+
+    def value(self, field, index):
+        flags = self.not_loaded.get(field)
+        if flags is not None and flags[index]:
+            self.columns[field][index] = self.fetch(field, [ index ])[0]
+            flags[index] = 0
+        return self.columns[field][index]
+
+    # values loaded into parent too, so cached snapshot of all windows keeps fields fetched for selected ones
+    def fetch(self, field, indexes):
+        if self.parent is not None:
+            parent_indexes = [ self.parent_positions[index] for index in indexes ]
+            self.parent.load([ field ], parent_indexes)
+            column = self.parent.columns[field]
+            return [ column[index] for index in parent_indexes ]
+        PrintUtil.log_debug(f"Lazy loading '{field}' for {len(indexes)} windows")
+        return self.loader(field, [ self.ids[index] for index in indexes ])
+
+    def append(self, window_id, desktop_id, pid, client, title, wm_class = '', geometry = None, stacking = UNDEFINED, recency = UNDEFINED):
+        self.ids.append(window_id)
+        self.columns['desktopId'].append(desktop_id)
+        self.columns['pid'].append(pid)
+        self.columns['client'].append(client)
+        self.columns['windowTitle'].append(title)
+        self.columns['wmClass'].append(wm_class)
+        self.columns['geometry'].append(geometry)
+        self.columns['stacking'].append(stacking)
+        self.columns['recency'].append(recency)
+
+    # not loaded values of watched fields copied from previous snapshot, except rows of changed windows
+    def reuse(self, previous, changed_ids):
+        old_positions = { window_id : index for index, window_id in enumerate(previous.ids) }
+        for field in self.WATCHED_FIELDS:
+            flags, old_flags = self.not_loaded.get(field), previous.not_loaded.get(field)
+            if flags is None:
+                continue
+            column, old_column = self.columns[field], previous.columns[field]
+            for index, window_id in enumerate(self.ids):
+                old_index = old_positions.get(window_id)
+                if old_index is None or window_id in changed_ids or (old_flags is not None and old_flags[old_index]):
+                    continue
+                column[index] = old_column[old_index]
+                flags[index] = 0
+
+    # new snapshot with rows at given positions
+    def take(self, indexes):
+        indexes = list(indexes)
+        snapshot = WindowsSnapshot(self.loader)
+        for field, column in self.columns.items():
+            snapshot.columns[field].extend(column[index] for index in indexes)
+        for field, flags in self.not_loaded.items():
+            snapshot.not_loaded[field] = bytearray(flags[index] for index in indexes)
+        if snapshot.not_loaded:
+            snapshot.parent, snapshot.parent_positions = self, indexes
+        return snapshot
+
+    # debug output should not trigger fetching, so loading is optional
+    def to_dicts(self, load = True):
+        load and self.load(self.PRINTED_FIELDS)
+        return [ row.to_dict() for row in self ]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Snapshot index out of range")
+        return WindowRow(self, index)
+
+    def __iter__(self):
+        return (WindowRow(self, index) for index in range(0, len(self)))
+
+# lightweight view on single snapshot row
+class WindowRow:
+    __slots__ = ('snapshot', 'index')
+
+    def __init__(self, snapshot, index):
+        self.snapshot = snapshot
+        self.index = index
+
+    @property
+    def window_id(self):
+        return self.snapshot.ids[self.index]
+
+    @property
+    def desktop_id(self):
+        return self.snapshot.value('desktopId', self.index)
+
+    @property
+    def pid(self):
+        return self.snapshot.value('pid', self.index)
+
+    @property
+    def client(self):
+        return self.snapshot.value('client', self.index)
+
+    @property
+    def title(self):
+        return self.snapshot.value('windowTitle', self.index)
+
+    @property
+    def wm_class(self):
+        return self.snapshot.value('wmClass', self.index)
+
+    @property
+    def geometry(self):
+        return self.snapshot.value('geometry', self.index)
+
+    def to_dict(self):
+        def format_int(value):
+            return 'N/A' if value == WindowsSnapshot.UNDEFINED else value
+
+        columns = self.snapshot.columns
+        return {
+            'windowId' : Utils.to_hex(columns['windowId'][self.index]),
+            'desktopId' : format_int(columns['desktopId'][self.index]),
+            'pid' : format_int(columns['pid'][self.index]),
+            'client' : columns['client'][self.index],
+            'windowTitle' : columns['windowTitle'][self.index]
+        }
+
+# difference between two snapshots, matched by window id, so it's O(N) instead of comparing each row with each
+class SnapshotDiff:
+    def __init__(self, old_snapshot, new_snapshot, fields = WindowsSnapshot.FIELDS[1:]):
+        old_positions = { window_id : index for index, window_id in enumerate(old_snapshot.ids) }
+        new_positions = { window_id : index for index, window_id in enumerate(new_snapshot.ids) }
+        compared_columns = [ (field, old_snapshot.column(field), new_snapshot.column(field)) for field in fields ]
+        added, modified = list(), list()
+        # <windowId> : [<changed fields>]
+        self.changes = {}
+        for new_index, window_id in enumerate(new_snapshot.ids):
+            old_index = old_positions.get(window_id)
+            if old_index is None:
+                added.append(new_index)
+                continue
+            changed_fields = [ field for field, old_column, new_column in compared_columns if old_column[old_index] != new_column[new_index] ]
+            if changed_fields:
+                modified.append(new_index)
+                self.changes[window_id] = changed_fields
+        self.added = new_snapshot.take(added)
+        self.modified = new_snapshot.take(modified)
+        self.removed = old_snapshot.take(index for index, window_id in enumerate(old_snapshot.ids) if window_id not in new_positions)
+
+    def __bool__(self):
+        return len(self.added) > 0 or len(self.removed) > 0 or len(self.modified) > 0
+
+    def __repr__(self):
+        return f"<SnapshotDiff added={len(self.added)} removed={len(self.removed)} modified={len(self.modified)}>"
+
+# windows and desktops snapshots, shared between invocations through memory mapped file
+# file: <MAGIC><header length, 4 bytes><json header><columns blobs>, replaced atomically, so readers never see partial write
+class SnapshotCache:
+    MAGIC = b'WZSC3\n'
+    HEADER_OFFSET = len(MAGIC) + 4
+
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+
+    # stamp - root window state, snapshot is valid only for same stamp and not older than ttl
+    # returns (<snapshot>, <desktops list>) or None
+    def read(self, stamp, loader):
+        try:
+            with open(self.path, 'rb') as cache_file, mmap.mmap(cache_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if data[:len(self.MAGIC)] != self.MAGIC:
+                    return None
+                header_length = int.from_bytes(data[len(self.MAGIC):self.HEADER_OFFSET], 'little')
+                header = json.loads(data[self.HEADER_OFFSET:self.HEADER_OFFSET + header_length])
+                if header['stamp'] != stamp or time() - header['time'] > self.ttl:
+                    PrintUtil.log_debug(f"Snapshot cache is outdated, {time() - header['time']:.2f} seconds old")
+                    return None
+                blobs_offset = self.HEADER_OFFSET + header_length
+                def blob(offset, length):
+                    return data[blobs_offset + offset:blobs_offset + offset + length]
+                snapshot = WindowsSnapshot(loader) if header['count'] is not None else None
+                for field, (offset, length, flags_offset) in header['columns'].items():
+                    if field in WindowsSnapshot.TYPECODES:
+                        snapshot.columns[field].frombytes(blob(offset, length))
+                    else:
+                        values = json.loads(blob(offset, length))
+                        snapshot.columns[field].extend(tuple(value) if isinstance(value, list) else value for value in values)
+                    if flags_offset is not None:
+                        snapshot.not_loaded[field] = bytearray(blob(flags_offset, header['count']))
+                PrintUtil.log_debug(f"Snapshot cache hit, {header['count']} windows")
+                return snapshot, header['desktops']
+        except (OSError, ValueError, KeyError) as ex:
+            # no cache yet or it's broken, so it would be rewritten
+            PrintUtil.log_debug(f"Can't read snapshot cache: {ex}")
+            return None
+
+    def write(self, stamp, snapshot, desktops):
+        header = { 'stamp' : stamp, 'time' : time(), 'count' : len(snapshot) if snapshot is not None else None, 'desktops' : desktops, 'columns' : {} }
+        blobs = bytearray()
+        for field in (WindowsSnapshot.FIELDS if snapshot is not None else []):
+            column = snapshot.columns[field]
+            data = column.tobytes() if field in WindowsSnapshot.TYPECODES else json.dumps(column).encode()
+            flags = snapshot.not_loaded.get(field)
+            header['columns'][field] = [ len(blobs), len(data), len(blobs) + len(data) if flags is not None else None ]
+            blobs += data
+            blobs += flags if flags is not None else b''
+        header_data = json.dumps(header).encode()
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'wb') as cache_file:
+                cache_file.write(self.MAGIC + len(header_data).to_bytes(4, 'little') + header_data + blobs)
+            os.replace(temp_path, self.path)
+        except OSError as ex:
+            PrintUtil.log_debug(f"Can't write snapshot cache: {ex}")
+
+    def invalidate(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+# most recently used windows, updated from focus changes and persisted between invocations
+# file is magic and 32-bit windows ids, most recently focused first, writes are merged under lock
+class RecentWindows:
+    MAGIC = b'WZMRU1\n'
+    # older windows are forgotten
+    CAPACITY = 128
+
+    def __init__(self, path):
+        self.path = path
+        # loaded on first access
+        self.ids = None
+        # windows focused since last store, oldest first
+        self.touched = []
+
+    def load(self):
+        if self.ids is None:
+            self.ids = self.read()
+        return self.ids
+
+    def read(self):
+        try:
+            with open(self.path, 'rb') as index_file:
+                data = index_file.read()
+        except OSError:
+            return []
+        if not data.startswith(self.MAGIC):
+            return []
+        ids, payload = array('I'), data[len(self.MAGIC):]
+        # last id can be cut, if disk is full
+        ids.frombytes(payload[:len(payload) - len(payload) % ids.itemsize])
+        return ids.tolist()
+
+    # window became focused
+    def touch(self, window_id):
+        ids = self.load()
+        if window_id is None or (ids and ids[0] == window_id):
+            return
+        self.ids = [ window_id ] + [ recent_id for recent_id in ids if recent_id != window_id ][:self.CAPACITY - 1]
+        self.touched.append(window_id)
+
+    def position(self, window_id):
+        try:
+            return self.load().index(window_id)
+        except ValueError:
+            return WindowsSnapshot.UNDEFINED
+
+    # existing - ids of all windows, closed ones are dropped from index
+    def store(self, existing = None):
+        if not self.touched and existing is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            # other invocations could focus windows too, so own changes applied to stored index
+            with open(f"{self.path}.lock", 'w') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                touched, self.ids = self.touched, self.read()
+                self.touched = []
+                for window_id in touched:
+                    self.touch(window_id)
+                existing = None if existing is None else set(existing)
+                ids = array('I', [ window_id for window_id in self.ids if existing is None or window_id in existing ])
+                temp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(temp_path, 'wb') as index_file:
+                    index_file.write(self.MAGIC + ids.tobytes())
+                os.replace(temp_path, self.path)
+            self.ids, self.touched = ids.tolist(), []
+            PrintUtil.log_debug(f"Recent windows index written, {len(self.ids)} windows")
+        except OSError as ex:
+            PrintUtil.log_warn(f"Can't write recent windows index to '{self.path}': {ex}")
+
+recent_windows = RecentWindows(recent_windows_path)
+
+# metrics of invocations in Prometheus text format, for node-exporter textfile collector
+# its parser matches samples to families by name, so counter families are named with `_total` suffix
+# each write merges pending observations into file under lock, so concurrent invocations add up
+class MetricsRecorder:
+    SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+    WINDOWS_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+    # <family> : (<type>, <help>, <buckets>)
+    METRICS = {
+        'wizarddes_scenario_duration_seconds' : ('histogram', "Duration of scenario execution", SECONDS_BUCKETS),
+        'wizarddes_token_duration_seconds' : ('histogram', "Duration of token execution", SECONDS_BUCKETS),
+        'wizarddes_create_time_to_window_seconds' : ('histogram', "Time from spawning runner to detecting its window", SECONDS_BUCKETS),
+        'wizarddes_snapshot_windows' : ('histogram', "Windows in snapshot, which query worked with", WINDOWS_BUCKETS),
+        'wizarddes_queries_total' : ('counter', "Executed queries", None),
+        'wizarddes_coalesced_runs_total' : ('counter', "Runs, joined to or dropped in favor of previous run of same scenario", None),
+        'wizarddes_x_requests_total' : ('counter', "Requests to X Server", None),
+        'wizarddes_spawns_total' : ('counter', "Spawned processes", None),
+        'wizarddes_snapshots_total' : ('counter', "Windows and desktops lists fetched", None)
+    }
+
+    def __init__(self, path, scenario):
+        self.path = path
+        self.scenario = scenario
+        # <family> : { <sample key> : <value> }, same as in file
+        self.pending = {}
+        self.stats_written = { 'requests' : 0, 'spawns' : 0, 'snapshots' : 0 }
+
+    def observe(self, family, value, **labels):
+        if self.path is None:
+            return
+        samples = self.pending.setdefault(family, {})
+        labels = { 'scenario' : self.scenario, **labels }
+        # all samples of label set added at once, so they stay together in file
+        for bound in self.METRICS[family][2]:
+            key = self.sample_key(family + '_bucket', dict(labels, le=str(float(bound))))
+            samples[key] = samples.get(key, 0) + (value <= bound)
+        for suffix, increment in [ ('_bucket', 1), ('_count', 1), ('_sum', value) ]:
+            key = self.sample_key(family + suffix, dict(labels, le='+Inf') if suffix == '_bucket' else labels)
+            samples[key] = samples.get(key, 0) + increment
+
+    def inc(self, family, value = 1, **labels):
+        if self.path is None or value == 0:
+            return
+        samples = self.pending.setdefault(family, {})
+        key = self.sample_key(family, { 'scenario' : self.scenario, **labels })
+        samples[key] = samples.get(key, 0) + value
+
+    @staticmethod
+    def sample_key(name, labels):
+        def escape(value):
+            return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        return name + '{' + ','.join(f'{label}="{escape(value)}"' for label, value in labels.items()) + '}'
+
+    # flush pending observations and X Server counters, collected since last write
+    def write(self):
+        if self.path is None:
+            return
+        for key, family in [ ('requests', 'wizarddes_x_requests_total'), ('spawns', 'wizarddes_spawns_total'), ('snapshots', 'wizarddes_snapshots_total') ]:
+            self.inc(family, windows_manager.stats[key] - self.stats_written[key])
+            self.stats_written[key] = windows_manager.stats[key]
+        if not self.pending:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            # file itself is replaced, so separate file is locked
+            with open(f"{self.path}.lock", 'w') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                stored = self.read()
+                for family, samples in self.pending.items():
+                    family_samples = stored.setdefault(family, {})
+                    for key, value in samples.items():
+                        family_samples[key] = family_samples.get(key, 0) + value
+                temp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(temp_path, 'w') as metrics_file:
+                    metrics_file.write(self.format(stored))
+                os.replace(temp_path, self.path)
+            PrintUtil.log_debug(f"Metrics written to '{self.path}'")
+            self.pending = {}
+        except OSError as ex:
+            PrintUtil.log_warn(f"Can't write metrics to '{self.path}': {ex}")
+
+    # samples of known families, unknown and broken lines dropped
+    def read(self):
+        stored, family = {}, None
+        try:
+            with open(self.path) as metrics_file:
+                for line in metrics_file:
+                    line = line.strip()
+                    if line.startswith('# TYPE '):
+                        family = line.split(' ')[2]
+                        family = family if family in self.METRICS else None
+                        continue
+                    if not line or line.startswith('#') or family is None:
+                        continue
+                    try:
+                        key, value = line.rsplit(' ', 1)
+                        stored.setdefault(family, {})[key] = float(value)
+                    except ValueError:
+                        PrintUtil.log_debug(f"Skipping broken metrics line: {line}")
+        except FileNotFoundError:
+            pass
+        return stored
+
+    def format(self, stored):
+        lines = list()
+        for family, (metric_type, help_text, _) in self.METRICS.items():
+            if family not in stored:
+                continue
+            lines.append(f"# HELP {family} {help_text}")
+            lines.append(f"# TYPE {family} {metric_type}")
+            for key, value in stored[family].items():
+                lines.append(f"{key} {int(value) if float(value).is_integer() else repr(float(value))}")
+        return '\n'.join(lines) + '\n'
+
 epilog_msg = r"""
 Unary operators:
-    Query: SWITCH(desktopId) | PRINT_DESKTOPS
+    Query: SWITCH(desktopId) | PRINT_DESKTOPS | PRINT_DESKTOPS_LIVE | SAVE_LAYOUT(name) | RESTORE_LAYOUT(name)
         SWITCH: 
             Switch active desktop
                 <desktopId> - id of target desktop, starting from 0 (int, >= 0)
+        SAVE_LAYOUT:
+            Save desktop, class, title and geometry of all windows to 'layouts' folder
+                <name> - layout file name (letters, digits, '.', '-', '_')
+        RESTORE_LAYOUT:
+            Move saved windows back to their desktops and geometry at once
+            Windows matched by class, title choose between windows of same class
+            Missing windows launched together with app runner, which named like window class, and placed when appear
+            Use '--wait-process-timeout' for specify waiting time (5 second by default)
+                <name> - layout file name
         PRINT_DESKTOPS:
             Print table of active desktops
+        PRINT_DESKTOPS_LIVE:
+            Same as 'PRINT_DESKTOPS', but table stays on screen and changed lines are redrawn, till Ctrl+C
 
 Binary operators:
     Grab opened windows and process results.
@@ -286,7 +901,7 @@ Binary operators:
         * - default scenario parameter
         $ - allow multiple tokens
         & - allow multiple tokens, but separeated with '&' symbol
-    Query:[CREATE(app_runner)|FORCE_CREATE(app_runner)]|[ALL|FIRST|LAST]|[BY ID(hex_string)|BY REGEX(regex)|BY CONTAINS(string)|BY FULL(sting)|BY DESK(int|*)]$ -> [CLOSE|PRINT|MV_TO(int|*)|MV_SEPARATE(interval|*)|ACTIVE|WAIT(int|*)]&
+    Query:[CREATE(app_runner[, int])|FORCE_CREATE(app_runner[, int])]|[ALL|FIRST|LAST|RECENT|LIMIT(int)]|[ORDER BY(field[,desc])]|[BY ID(hex_string)|BY REGEX(regex)|BY CONTAINS(string)|BY FULL(sting)|BY DESK(int|*)|BY SCREEN(int)|BY AREA(x,y,width,height)|BY RECENT(int)]$ -> [CLOSE|PRINT|PRINT_LIVE|COUNT|GROUP_BY(field)|MV_TO(int|*)|MV_SEPARATE(interval|*)|ACTIVE|WAIT(int|*)|WAIT_FOR(filters[, int|*])]&
         Selectors:
             If filters not defined, select from all opened windows
             ALL:
@@ -295,6 +910,17 @@ Binary operators:
                 Select first window from target list
             LAST:
                 Select last window from target list
+            LIMIT:
+                Select first <int> windows from target list, after LAST - last <int> windows
+                Example: LAST LIMIT(3)
+            RECENT:
+                Select most recently focused window from target list, with LIMIT - <int> windows in order of focus
+                Example: RECENT BY CONTAINS(Firefox)
+            ORDER BY:
+                Order target list by window field, instead of windows list order, combine with selectors to get top windows
+                <field> - windowId, desktopId, pid, client, windowTitle, wmClass, geometry, stacking (topmost window is last) or recency (focused window is first)
+                <desc> - descending order
+                Example: FIRST ORDER BY(stacking,desc)
         Filters:
             BY ID:
                 Match window with selected id (hex string)
@@ -312,17 +938,38 @@ Binary operators:
                 Match window in selected desktop:
                 <*> - current desktop
                 Example: BY DESK(2)
+            BY SCREEN:
+                Match window, which center is on selected monitor (RandR monitors, from left to right)
+                Example: BY SCREEN(0)
+            BY AREA:
+                Match window, which overlaps rectangle on screen
+                Example: BY AREA(0,0,1920,540)
+            BY RECENT:
+                Match window, if it's one of <int> recently focused windows
+                Example: BY RECENT(5)
         App runners:   
             CREATE:
                 Run executable from 'app_runners' file and wait until window opened
                 Use '--wait-process-timeout' for specify waiting time (5 second by default)
+                <int> - start given number of instances at once and return all their windows
                 Example: CREATE(firefox)
+                Example: CREATE(terminal, 4) -> MV_SEPARATE(*)
             FORCE_CREATE:
                 Same as 'CREATE', but don't wait until process end, so window can't be processed in query
                 Example: FORCE_CREATE(firefox)
         Processors:
             PRINT:
                 Display table of target windows
+            PRINT_LIVE:
+                Display table of windows, matched by selector and filters, and keep it up to date, till Ctrl+C
+                Windows are selected again after each change, only changed lines are redrawn (not more often than 4 times per second)
+            COUNT:
+                Display number of target windows
+            GROUP_BY:
+                Display number of target windows for each value of field, counted in single pass
+                For desktopId desktops without windows are shown too
+                <field> - windowId, desktopId, pid, client, windowTitle, wmClass, geometry, stacking or recency
+                Example: GROUP_BY(desktopId)
             ACTIVE:
                 Set active target window
                 If target windows more then one, raise exception, so use filters right
@@ -331,6 +978,13 @@ Binary operators:
                 <*> - 5 seconds
                 <int> - seconds
                 Example: WAIT(1)
+            WAIT_FOR:
+                Wait until windows, matched by selector and filters, appear, then process them instead of target windows
+                Windows are checked again only after they changed, so it returns as soon as condition is met
+                <filters> - selector and filters, like in data selecting part
+                <*> - timeout is 5 seconds
+                <int> - timeout in seconds, query fails if nothing matched in time
+                Example: WAIT_FOR(FIRST BY CONTAINS(Terminal) BY DESK(2), 10)
             CLOSE:
                 Close target windows
             MV_TO:
@@ -353,6 +1007,12 @@ Binary operators:
 For more info: https://github.com/rostegg/wizarddes
 """
 
+# argparse type for counts, which can't be zero
+def positive_int(value):
+    if re.fullmatch(r"[1-9][0-9]*", value.strip()) is None:
+        raise argparse.ArgumentTypeError(f"expected positive int, got '{value}'")
+    return int(value)
+
 def get_params():
     parser = argparse.ArgumentParser(description="Automatize your desktop management", epilog=epilog_msg, formatter_class=RawTextHelpFormatter)
     parser.add_argument('scenario_name', type=str, help=f"Name of rules file in '{rules_storage_path}' folder",
@@ -365,34 +1025,237 @@ def get_params():
                     action="store")
     parser.add_argument("--query-file", help="Full path to query file",
                     action="store")
+    parser.add_argument("--stdin", help="Execute queries from stdin as they arrive, one JSON result line per query in stdout",
+                    action="store_true")
     parser.add_argument("--debug-mode", help="Execute in debug mode",
                     action="store_true")
     parser.add_argument("--rules-list", help=f"Display available rules files in '{rules_storage_path}' folder",
                     action="store_true")
-    parser.add_argument("--use-wmctrl", help="Use `wmctrl` util instead of xlib",
+    parser.add_argument("--backend", help="Backend for interacting with X Server (xlib by default)",
+                    action="store", choices=['xlib', 'xcb', 'wmctrl'], default='xlib')
+    parser.add_argument("--use-wmctrl", help="Same as `--backend wmctrl`, left for compatibility",
                     action="store_true")
+    parser.add_argument("--query-timeout", type=float, help="Time budget of each query in seconds, blocking tokens are interrupted, when it's exceeded (not limited by default)",
+                    action="store", default=0)
+    parser.add_argument("--scenario-timeout", type=float, help="Time budget of all queries in seconds, rest of queries fail, when it's exceeded (not limited by default)",
+                    action="store", default=0)
+    parser.add_argument("--transactional", help="Buffer windows moves and closes, apply them at once at scenario end or when next token depends on them",
+                    action="store_true")
+    parser.add_argument("--action-delay", type=float, help=f"Delay in seconds after each window action, so window manager can apply it ({ACTION_DELAY} by default, `--bench` suggests value for your window manager)",
+                    action="store", default=ACTION_DELAY)
+    parser.add_argument("--bench", type=positive_int, help="Measure backends latency on live display in given rounds (20 by default), moves one window and switches desktop there and back",
+                    action="store", nargs='?', const=20, metavar="ROUNDS")
+    parser.add_argument("--format", help="Output format of PRINT, PRINT_DESKTOPS, COUNT and GROUP_BY (table by default), with json and tsv logs go to stderr",
+                    action="store", choices=['table', 'json', 'tsv'], default='table')
+    parser.add_argument("--explain", help="Show execution plan and cost estimate of queries without executing them",
+                    action="store_true")
+    parser.add_argument("--metrics-file", help="Add latency histograms and X Server requests counters of this run to file in Prometheus text format (for node-exporter textfile collector)",
+                    action="store", metavar="FILE_PATH")
+    parser.add_argument("--snapshot-cache-ttl", type=float, help=f"Reuse windows snapshot of other invocations not older than given seconds from '{snapshot_cache_path}' (disabled by default)",
+                    action="store", default=0)
+    parser.add_argument("--watch-recent", help="Keep index of recently focused windows for RECENT tokens up to date, till Ctrl+C (start it with session, not supported by `wmctrl` backend)",
+                    action="store_true")
+    parser.add_argument("--debounce", type=float, help="Join or drop runs of same scenario, requested within given seconds after start of previous one (disabled by default)",
+                    action="store", default=0)
     options = parser.parse_args()
     return options
 
 options = get_params()
-
-if (options.use_wmctrl):
-    if (not Utils.wmctrl_status()):
-        PrintUtil.log_error("Seems, like `wmctrl` is not installed...")
-        exit(1)
-else:
-    from Xlib import display, X, protocol
+ACTION_DELAY = options.action_delay
+# `--use-wmctrl` left for compatibility
+options.backend = 'wmctrl' if options.use_wmctrl else options.backend
+# in `--stdin` mode stdout is for results only, logs and tables go to stderr
+# with `json` and `tsv` formats stdout is for rows only, so it can be parsed
+results_output = sys.stdout
+rows_output = sys.stderr if options.stdin else sys.stdout
+if options.stdin or options.format != 'table':
+    sys.stdout = sys.stderr
 
 class WindowsManager(object):
-    def get_windows_list(self):
-        raise NotAvailableOperatioException("Not implemented 'get_windows_list'")
+    # estimated cost of fetching single field for single window
+    FIELDS_COST = { field : 1 for field in WindowsSnapshot.FIELDS }
+    # <operation> : (<X Server requests>, <spawned processes>), snapshot - windows ids only
+    OPERATIONS_COST = {
+        'snapshot' : (1, 0),
+        'mv_to' : (1, 0),
+        'close' : (1, 0),
+        'active' : (3, 0),
+        'switch' : (1, 0),
+        'move_resize' : (1, 0)
+    }
+    # seconds between snapshots, when backend can't wait for X events
+    POLL_INTERVAL = 0.2
+    # values of _NET_WM_WINDOW_TYPE, which windows are parts of desktop itself
+    SPECIAL_WINDOW_TYPES = ('_NET_WM_WINDOW_TYPE_DESKTOP', '_NET_WM_WINDOW_TYPE_DOCK')
+
+    def __init__(self):
+        # counters of X Server requests, spawned processes and windows/desktops lists
+        self.stats = { 'requests' : 0, 'spawns' : 0, 'snapshots' : 0 }
+        self.snapshot_cache = None
+        # { 'stamp', 'snapshot', 'desktops', 'written', 'checked' } for current root window stamp
+        # stamp checked once per query, till store_snapshots() call
+        self.cache_entry = None
+        # windows in last snapshot, for metrics
+        self.snapshot_size = None
+        # monitors of current query, read once for all SCREEN filters
+        self.monitors = None
+
+    # fields - snapshot fields, which should be fetched immediately, other loaded on first access
+    # filters - FilterObjects, which manager should apply before fetching rest of fields
+    # range_object - RangeObject, which cut matched windows
+    # cached - snapshot can be taken from cache, loops, which wait for changes, should not use it
+    def get_windows_list(self, fields = WindowsSnapshot.FIELDS, filters = [], range_object = None, cached = True):
+        entry = self.__cache_entry() if cached else None
+        if entry is not None and entry['snapshot'] is None:
+            entry['snapshot'] = self.enumerate_windows()
+        snapshot = entry['snapshot'] if entry is not None else self.enumerate_windows()
+        self.snapshot_size = len(snapshot)
+        snapshot = self.select_windows(snapshot, filters, range_object)
+        snapshot.load(fields)
+        return snapshot
+
+    # snapshot of all windows, fields may be not loaded yet
+    def enumerate_windows(self):
+        raise NotAvailableOperatioException("Not implemented 'enumerate_windows'")
+
+    def get_desktops_list(self, cached = True):
+        entry = self.__cache_entry() if cached else None
+        if entry is None:
+            return self.enumerate_desktops()
+        if entry['desktops'] is None:
+            entry['desktops'] = self.enumerate_desktops()
+        return entry['desktops']
+
+    def enumerate_desktops(self):
+        raise NotAvailableOperatioException("Not implemented 'enumerate_desktops'")
+
+    # monitors rectangles from left to right, so SCREEN(0) is leftmost one
+    def get_monitors(self):
+        if self.monitors is not None:
+            return self.monitors
+        monitors = self.enumerate_monitors()
+        if len(monitors) == 0:
+            # without RandR whole desktop is single screen
+            width, height = self.get_desktops_list()[0]['geometry'].split('x')
+            monitors = [ (0, 0, int(width), int(height)) ]
+        self.monitors = sorted(monitors)
+        PrintUtil.log_debug(f"Monitors from left to right: {self.monitors}")
+        return self.monitors
+
+    # (<x>, <y>, <width>, <height>) of RandR monitors, empty list, if backend can't get them
+    def enumerate_monitors(self):
+        return []
+
+    # cheap value, which changes with windows list, current desktop, desktops count or active window
+    # None, if backend can't get it cheaper, than whole snapshot
+    def snapshot_stamp(self):
+        return None
+
+    def __cache_entry(self):
+        if self.cache_entry is not None and self.cache_entry['checked']:
+            return self.cache_entry
+        stamp = self.snapshot_stamp() if self.snapshot_cache is not None else None
+        if stamp is None:
+            return None
+        if self.cache_entry is None or self.cache_entry['stamp'] != stamp:
+            cached = self.snapshot_cache.read(stamp, self.fetch_windows_field)
+            snapshot, desktops = cached if cached is not None else (None, None)
+            self.cache_entry = { 'stamp' : stamp, 'snapshot' : snapshot, 'desktops' : desktops, 'written' : self.__cache_version(snapshot, desktops) if cached else None }
+        self.cache_entry['checked'] = True
+        return self.cache_entry
+
+    # changes, when something new fetched
+    def __cache_version(self, snapshot, desktops):
+        if snapshot is None:
+            return (None, desktops is not None)
+        return (len(snapshot.not_loaded), sum(sum(flags) for flags in snapshot.not_loaded.values()), desktops is not None)
+
+    # share fetched data with next invocations
+    def store_snapshots(self):
+        entry = self.cache_entry
+        if entry is None:
+            return
+        entry['checked'] = False
+        version = self.__cache_version(entry['snapshot'], entry['desktops'])
+        if version != entry['written']:
+            PrintUtil.log_debug(f"Writing snapshot cache to '{self.snapshot_cache.path}'")
+            self.snapshot_cache.write(entry['stamp'], entry['snapshot'], entry['desktops'])
+            entry['written'] = version
+
+    # after own actions windows could be changed without stamp changes (desktops, geometry)
+    def invalidate_snapshots(self):
+        if self.snapshot_cache is None:
+            return
+        self.cache_entry = None
+        self.snapshot_cache.invalidate()
+
+    # lowest rank first, field fetched by previous filter is free for next ones
+    def order_filters(self, snapshot, filters):
+        filters, ordered = list(filters), list()
+        loaded_fields = set(snapshot.loaded_fields())
+        while len(filters) > 0:
+            filter_object = min(filters, key=lambda f: f.rank(0 if f.field in loaded_fields else self.FIELDS_COST[f.field]))
+            filters.remove(filter_object)
+            ordered.append(filter_object)
+            loaded_fields.add(filter_object.field)
+        return ordered
+
+    # windows passed through filters one by one, so nothing fetched for windows after range cut-off
+    def select_windows(self, snapshot, filters, range_object = None):
+        range_object = range_object or RangeFilters.filter_all
+        filters = self.order_filters(snapshot, filters)
+        if snapshot.spatial_index is None and any(filter_object.is_spatial() for filter_object in filters):
+            snapshot.spatial_index = SpatialIndex(self.get_monitors())
+        PrintUtil.log_debug(f"Streaming {len(snapshot)} windows through {filters} to {range_object}")
+        indexes = range(0, len(snapshot))
+        # order field costs nothing, so windows streamed in its order and filters stop after limit, like for FIRST
+        presorted = range_object.limit is not None and range_object.order_field is not None and self.FIELDS_COST[range_object.order_field] == 0
+        if presorted:
+            indexes = range_object.ordered(snapshot, indexes)
+        stream = reversed(indexes) if range_object.reverse and range_object.order_field is None else iter(indexes)
+        for filter_object in filters:
+            # without limit every window, passed previous filter, reach next one,
+            # so its field fetched in one batch, backends may pipeline such requests
+            if not range_object.is_streaming() and not presorted:
+                stream = list(stream)
+                snapshot.load([ filter_object.field ], stream)
+            stream = filter_object.stream(snapshot, stream)
+        selected = range_object.select(stream, snapshot, presorted)
+        if len(selected) == 0 and len(filters) > 0:
+            raise EmptyQueryResult("Zero result found for query..")
+        return snapshot.take(selected)
+
+    # block until windows may be changed or timeout expired, caller compares snapshots anyway
+    # returns set of ids of changed windows, or None, if backend doesn't know, which ones are changed
+    def wait_for_change(self, window_ids, timeout):
+        sleep(min(timeout, self.POLL_INTERVAL))
+        return None
+
+    # import python modules or check utils, required by backend
+    @staticmethod
+    def load_dependencies():
+        pass
+
+    # all processes are started here, so spawns counter matches estimates of `--explain`
+    def spawn(self, command, **kwargs):
+        process = Popen(command, **kwargs)
+        self.stats['spawns'] += 1
+        return process
 
-    def get_desktops_list(self):
-        raise NotAvailableOperatioException("Not implemented 'get_desktops_list'")
         
     def mv_to(self, window_id, desktop_id):
         raise NotAvailableOperatioException("Not implemented 'mv_to'")
 
+    # geometry - (<x>, <y>, <width>, <height>) of window without frame
+    def move_resize(self, window_id, geometry):
+        raise NotAvailableOperatioException("Not implemented 'move_resize'")
+
+    # placements - [(<windowId>, <desktopId>, <geometry or None>)], caller waits once for whole batch
+    def place_windows(self, placements):
+        for window_id, desktop_id, geometry in placements:
+            self.mv_to(window_id, desktop_id)
+            geometry and self.move_resize(window_id, geometry)
+
     def close(self, window_id):
         raise NotAvailableOperatioException("Not implemented 'close'")
     
@@ -402,34 +1265,94 @@ class WindowsManager(object):
     def active(self, window_id):
         raise NotAvailableOperatioException("Not implemented 'active'")
 
+    # id of focused window or None
+    def active_window(self):
+        raise NotAvailableOperatioException("Not implemented 'active_window'")
+
+    # desktop or dock window, which shouldn't be moved, False if backend can't get window type
+    def is_special_window(self, window_id):
+        return False
+
+    # positions in index of recently focused windows, focused window is first, even if index is not watched
+    def recent_positions(self, window_ids):
+        try:
+            recent_windows.touch(self.active_window())
+        except NotAvailableOperatioException:
+            pass
+        return [ recent_windows.position(window_id) for window_id in window_ids ]
+
+    # without focused window and index of recently focused windows order by focus is arbitrary
+    def assert_focus_known(self, token):
+        try:
+            recent_windows.touch(self.active_window())
+        except NotAvailableOperatioException:
+            pass
+        if not recent_windows.load():
+            raise NotAvailableOperatioException(f"Can't execute '{token}', no focused windows are known, run `--watch-recent` with session (not supported by `wmctrl` backend) or focus window by `ACTIVE`")
+
 # later should change data formats for windows info
 # https://specifications.freedesktop.org/wm-spec/wm-spec-latest.html
 class XlibUtils(WindowsManager):
+    # ids already received with _NET_CLIENT_LIST, titles are longest replies
+    FIELDS_COST = {
+        'windowId' : 0,
+        'desktopId' : 1,
+        'pid' : 1,
+        'client' : 1,
+        'windowTitle' : 2,
+        'wmClass' : 1,
+        # size and position are separate requests
+        'geometry' : 2,
+        # single request for all windows
+        'stacking' : 0,
+        # read from local index, active window is single request
+        'recency' : 0
+    }
+
+    @staticmethod
+    def load_dependencies():
+        global display, X, protocol
+        try:
+            from Xlib import display, X, protocol
+        except ImportError:
+            raise NotAvailableOperatioException("Seems, like `python-xlib` is not installed, try `pip install python-xlib`")
+
     def __init__(self, target_display = None, root = None):
+        super().__init__()
         self.display = target_display or display.Display()
         self.root = self.display.screen().root
         self.required_windows_fields = {
             'desktopId' : '_NET_WM_DESKTOP',
             'pid' : '_NET_WM_PID',
             'client' : 'WM_CLIENT_MACHINE',
-            'windowTitle' : '_NET_WM_NAME' 
+            'windowTitle' : '_NET_WM_NAME',
+            'wmClass' : 'WM_CLASS'
         }
+        # windows with selected PropertyChangeMask, root one is for _NET_CLIENT_LIST
+        self.watched_windows = set()
     
     # <windowId> <desktopId> <pid> <client> <windowTitle>
-    def get_windows_list(self):
-        target_windows = [ self.__create_window(w) for w in self.__get_property('_NET_CLIENT_LIST', False) ]
-        windows_list = list() 
-        for window in target_windows:
-            window_data_object = {}
-            window_data_object['windowId'] = Utils.to_hex(window.id)
-            for key, value in self.required_windows_fields.items():  
-                value = self.__get_property(value, target=window)
-                window_data_object[key] = value
-            windows_list.append(window_data_object)
-        return windows_list
+    def enumerate_windows(self):
+        self.stats['snapshots'] += 1
+        return WindowsSnapshot.from_ids(self.__get_property('_NET_CLIENT_LIST', False) or [], self.fetch_windows_field)
+
+    def fetch_windows_field(self, field, window_ids):
+        if field == 'geometry':
+            return [ self.__get_window_geometry(self.__create_window(window_id)) for window_id in window_ids ]
+        if field == 'stacking':
+            return Utils.stacking_positions(self.__get_property('_NET_CLIENT_LIST_STACKING', False), window_ids)
+        if field == 'recency':
+            return self.recent_positions(window_ids)
+        return [ self.__get_window_field(field, self.__create_window(window_id)) for window_id in window_ids ]
     
+    def snapshot_stamp(self):
+        client_list = self.__get_property('_NET_CLIENT_LIST', False) or []
+        values = [ self.__get_property(name) for name in ['_NET_CURRENT_DESKTOP', '_NET_NUMBER_OF_DESKTOPS', '_NET_ACTIVE_WINDOW'] ]
+        return ':'.join([ hashlib.sha1(array('L', client_list).tobytes()).hexdigest() ] + [ str(value) for value in values ])
+
     # <desktopId> <active> <geometry> <viewport> <workAreaGeometry> <workAreaResolution> <title>
-    def get_desktops_list(self):
+    def enumerate_desktops(self):
+        self.stats['snapshots'] += 1
         desktops_list = list()
         desktops_work_area_geometry = self.__get_property('_NET_WORKAREA', False)
         desktops_geometry = self.__get_property('_NET_DESKTOP_GEOMETRY',False)
@@ -452,17 +1375,35 @@ class XlibUtils(WindowsManager):
         return desktops_list
 
     def mv_to(self, window_id, desktop_id):
-        window = self.__create_window(int(window_id, 16))
-        self.__set_property('_NET_WM_DESKTOP', [int(desktop_id), 1], target=window)
+        window = self.__create_window(window_id)
+        self.__set_property('_NET_WM_DESKTOP', [desktop_id, 1], target=window)
+        self.__flush()
+
+    def move_resize(self, window_id, geometry):
+        self.__set_property('_NET_MOVERESIZE_WINDOW', [Utils.MOVERESIZE_FLAGS, *geometry], target=self.__create_window(window_id))
+        self.__flush()
+
+    # all messages flushed at once
+    def place_windows(self, placements):
+        for window_id, desktop_id, geometry in placements:
+            window = self.__create_window(window_id)
+            self.__set_property('_NET_WM_DESKTOP', [desktop_id, 1], target=window)
+            geometry and self.__set_property('_NET_MOVERESIZE_WINDOW', [Utils.MOVERESIZE_FLAGS, *geometry], target=window)
         self.__flush()
 
     def close(self, window_id):
-        window = self.__create_window(int(window_id, 16))
+        window = self.__create_window(window_id)
         self.__set_property('_NET_CLOSE_WINDOW', [X.CurrentTime, 1], target=window)
         self.__flush()
 
+    def active_window(self):
+        return self.__get_property('_NET_ACTIVE_WINDOW') or None
+
+    def is_special_window(self, window_id):
+        types = self.__get_property('_NET_WM_WINDOW_TYPE', False, target=self.__create_window(window_id)) or []
+        return any(self.display.get_atom(name) in types for name in self.SPECIAL_WINDOW_TYPES)
+
     def active(self, window_id):
-        window_id = int(window_id, 16)
         window = self.__create_window(window_id)
         target_desktop = self.__get_property('_NET_WM_DESKTOP', target = window)
         self.switch(target_desktop)
@@ -474,12 +1415,78 @@ class XlibUtils(WindowsManager):
         self.__set_property('_NET_CURRENT_DESKTOP', [desktop_id, X.CurrentTime])
         self.__flush()
 
+    # woken by PropertyNotify of root (new or closed windows) or of watched windows (titles, desktops)
+    def wait_for_change(self, window_ids, timeout):
+        self.__watch_windows(window_ids)
+        changed = set()
+        if self.__drain_events(changed):
+            return changed
+        select([ self.display ], [], [], timeout)
+        self.__drain_events(changed)
+        return changed
+
+    def __watch_windows(self, window_ids):
+        if not self.watched_windows:
+            self.root.change_attributes(event_mask=X.PropertyChangeMask)
+            self.watched_windows.add(self.root.id)
+        for window_id in set(window_ids) - self.watched_windows:
+            self.stats['requests'] += 1
+            # window can be closed already, error is expected then
+            self.__create_window(window_id).change_attributes(event_mask=X.PropertyChangeMask, onerror=lambda *args: None)
+            self.watched_windows.add(window_id)
+        self.__flush()
+
+    # changed - set, where ids of windows from received events are added
+    def __drain_events(self, changed):
+        received = False
+        while self.display.pending_events():
+            event = self.display.next_event()
+            changed.add(event.window.id)
+            received = True
+        return received
+
     def __parse_value(self, value, single):
         value = value.decode() if isinstance(value, (bytes, bytearray)) else value
-        value = (str(value[0]) if single else value) if isinstance(value, (array)) else value
+        value = (value[0] if single else value) if isinstance(value, (array)) else value
         return value
 
+    # ints for snapshot arrays, strings for text fields
+    def __get_window_field(self, field, window):
+        value = self.__get_property(self.required_windows_fields[field], target=window)
+        if field in WindowsSnapshot.TYPECODES:
+            return WindowsSnapshot.UNDEFINED if value is None else int(value)
+        if field == 'wmClass':
+            return Utils.format_wm_class(value)
+        return '' if value is None else value
+
+    # RandR 1.5 monitors, python-xlib adds method to windows, when server has extension
+    def enumerate_monitors(self):
+        if not self.display.has_extension('RANDR'):
+            return []
+        self.stats['requests'] += 1
+        try:
+            reply = self.root.xrandr_get_monitors()
+        except Exception as ex:
+            # RandR older, than 1.5
+            PrintUtil.log_debug(f"Can't get monitors: {ex}")
+            return []
+        return [ (monitor.x, monitor.y, monitor.width_in_pixels, monitor.height_in_pixels) for monitor in reply.monitors ]
+
+    # position relative to root, frame is not included
+    def __get_window_geometry(self, window):
+        self.stats['requests'] += 2
+        try:
+            size = window.get_geometry()
+            position = self.root.translate_coords(window, 0, 0)
+            return (position.x, position.y, size.width, size.height)
+        except Exception as ex:
+            # window closed, while fetching
+            PrintUtil.log_debug(f"Can't get geometry of <{Utils.to_hex(window.id)}>: {ex}")
+            return None
+
     def __set_property(self, atom_type, data, target = None):
+        self.stats['requests'] += 1
+        self.invalidate_snapshots()
         target = self.root if target is None else target
         
         data = (data+[0]*(5-len(data)))[:5]
@@ -497,6 +1504,7 @@ class XlibUtils(WindowsManager):
         self.display.flush()
 
     def __get_property(self, atom_type, single = True,target = None):
+        self.stats['requests'] += 1
         target = self.root if target is None else target
         atom = target.get_full_property(self.display.get_atom(atom_type), X.AnyPropertyType)
         return self.__parse_value(atom.value, single) if hasattr(atom, 'value') else None
@@ -504,70 +1512,681 @@ class XlibUtils(WindowsManager):
     def __create_window(self, window_id):
         return self.display.create_resource_object('window', window_id) if window_id is not None else None
 
+# xcb requests return cookies, so all requests sent at once and replies readed after
+class XcbUtils(WindowsManager):
+    # requests for all windows are in flight at once, so single window costs less, then in xlib
+    FIELDS_COST = {
+        'windowId' : 0,
+        'desktopId' : 0.2,
+        'pid' : 0.2,
+        'client' : 0.2,
+        'windowTitle' : 0.4,
+        'wmClass' : 0.2,
+        'geometry' : 0.4,
+        'stacking' : 0,
+        'recency' : 0
+    }
+    # in 32-bit units, whole property readed with single request, without length probe
+    MAX_PROPERTY_LENGTH = 2**16
+
+    @staticmethod
+    def load_dependencies():
+        global xcffib, xproto, randr
+        try:
+            import xcffib
+            from xcffib import xproto, randr
+        except ImportError:
+            raise NotAvailableOperatioException("Seems, like `xcffib` is not installed, try `pip install xcffib`")
+
+    def __init__(self):
+        super().__init__()
+        self.connection = xcffib.connect()
+        self.root = self.connection.get_setup().roots[self.connection.pref_screen].root
+        self.required_windows_fields = {
+            'desktopId' : '_NET_WM_DESKTOP',
+            'pid' : '_NET_WM_PID',
+            'client' : 'WM_CLIENT_MACHINE',
+            'windowTitle' : '_NET_WM_NAME',
+            'wmClass' : 'WM_CLASS'
+        }
+        self.atoms = {}
+        # windows with selected PropertyChange event, root one is for _NET_CLIENT_LIST
+        self.watched_windows = set()
+        self.__intern_atoms(['_NET_CLIENT_LIST', '_NET_WORKAREA', '_NET_DESKTOP_GEOMETRY', '_NET_CURRENT_DESKTOP', '_NET_NUMBER_OF_DESKTOPS',
+            '_NET_DESKTOP_VIEWPORT', '_NET_CLOSE_WINDOW', '_NET_ACTIVE_WINDOW', '_NET_MOVERESIZE_WINDOW', '_NET_CLIENT_LIST_STACKING'] + list(self.required_windows_fields.values()))
+
+    def enumerate_windows(self):
+        self.stats['snapshots'] += 1
+        window_ids = self.__parse_reply(self.__request_property('_NET_CLIENT_LIST'), False)
+        return WindowsSnapshot.from_ids(window_ids or [], self.fetch_windows_field)
+
+    # all requests sent before first reply is readed
+    def fetch_windows_field(self, field, window_ids):
+        if field == 'geometry':
+            return self.__fetch_geometry(window_ids)
+        if field == 'stacking':
+            return Utils.stacking_positions(self.__parse_reply(self.__request_property('_NET_CLIENT_LIST_STACKING'), False), window_ids)
+        if field == 'recency':
+            return self.recent_positions(window_ids)
+        cookies = [ self.__request_property(self.required_windows_fields[field], window_id) for window_id in window_ids ]
+        return [ self.__parse_window_field(field, cookie) for cookie in cookies ]
+
+    # position relative to root, frame is not included
+    def __fetch_geometry(self, window_ids):
+        self.stats['requests'] += 2 * len(window_ids)
+        cookies = [ (self.connection.core.GetGeometry(window_id), self.connection.core.TranslateCoordinates(window_id, self.root, 0, 0)) for window_id in window_ids ]
+        geometries = list()
+        for size_cookie, position_cookie in cookies:
+            try:
+                size, position = size_cookie.reply(), position_cookie.reply()
+                geometries.append((position.dst_x, position.dst_y, size.width, size.height))
+            except xcffib.ProtocolException:
+                # window closed, while request was in flight
+                geometries.append(None)
+        return geometries
+
+    def enumerate_monitors(self):
+        self.stats['requests'] += 1
+        try:
+            reply = self.connection(randr.key).GetMonitors(self.root, True).reply()
+        except Exception as ex:
+            # server without RandR or RandR older, than 1.5
+            PrintUtil.log_debug(f"Can't get monitors: {ex}")
+            return []
+        return [ (monitor.x, monitor.y, monitor.width, monitor.height) for monitor in reply.monitors ]
+
+    def snapshot_stamp(self):
+        cookies = [ self.__request_property(name) for name in ['_NET_CLIENT_LIST', '_NET_CURRENT_DESKTOP', '_NET_NUMBER_OF_DESKTOPS', '_NET_ACTIVE_WINDOW'] ]
+        client_list = self.__parse_reply(cookies[0], False) or []
+        values = [ self.__parse_reply(cookie) for cookie in cookies[1:] ]
+        return ':'.join([ hashlib.sha1(array('L', client_list).tobytes()).hexdigest() ] + [ str(value) for value in values ])
+
+    # <desktopId> <active> <geometry> <viewport> <workAreaGeometry> <workAreaResolution> <title>
+    def enumerate_desktops(self):
+        self.stats['snapshots'] += 1
+        cookies = { name : self.__request_property(name) for name in ['_NET_WORKAREA', '_NET_DESKTOP_GEOMETRY', '_NET_CURRENT_DESKTOP', '_NET_NUMBER_OF_DESKTOPS', '_NET_DESKTOP_VIEWPORT'] }
+        desktops_work_area_geometry = self.__parse_reply(cookies['_NET_WORKAREA'], False)
+        desktops_geometry = self.__parse_reply(cookies['_NET_DESKTOP_GEOMETRY'], False)
+        current_desktop = self.__parse_reply(cookies['_NET_CURRENT_DESKTOP'])
+        desktops_count = self.__parse_reply(cookies['_NET_NUMBER_OF_DESKTOPS'])
+        view_port = self.__parse_reply(cookies['_NET_DESKTOP_VIEWPORT'], False)
+        desktops_list = list()
+        for desktop_id in range(0, desktops_count):
+            work_area_data = desktops_work_area_geometry[desktop_id*4:desktop_id*4+4]
+            desktops_list.append({
+                'desktopId' : desktop_id,
+                'active' : '*' if desktop_id == current_desktop else '-',
+                'workAreaGeometry' : f"{work_area_data[0]}.{work_area_data[1]}",
+                'workAreaResolution' : f"{work_area_data[2]}x{work_area_data[3]}",
+                'geometry' : f"{desktops_geometry[0]}x{desktops_geometry[1]}",
+                'viewport' : f"{view_port[0]},{view_port[1]}" if desktop_id == current_desktop else 'N/A'
+            })
+        return desktops_list
+
+    def mv_to(self, window_id, desktop_id):
+        self.__send_message('_NET_WM_DESKTOP', [desktop_id, 1], window_id)
+        self.connection.flush()
+
+    def move_resize(self, window_id, geometry):
+        self.__send_message('_NET_MOVERESIZE_WINDOW', [Utils.MOVERESIZE_FLAGS, *geometry], window_id)
+        self.connection.flush()
+
+    # all messages flushed at once
+    def place_windows(self, placements):
+        for window_id, desktop_id, geometry in placements:
+            self.__send_message('_NET_WM_DESKTOP', [desktop_id, 1], window_id)
+            geometry and self.__send_message('_NET_MOVERESIZE_WINDOW', [Utils.MOVERESIZE_FLAGS, *geometry], window_id)
+        self.connection.flush()
+
+    def close(self, window_id):
+        self.__send_message('_NET_CLOSE_WINDOW', [xproto.Time.CurrentTime, 1], window_id)
+        self.connection.flush()
+
+    def active_window(self):
+        return self.__parse_reply(self.__request_property('_NET_ACTIVE_WINDOW')) or None
+
+    def is_special_window(self, window_id):
+        types = self.__parse_reply(self.__request_property('_NET_WM_WINDOW_TYPE', window_id), False) or []
+        return any(self.__get_atom(name) in types for name in self.SPECIAL_WINDOW_TYPES)
+
+    def active(self, window_id):
+        self.switch(self.__parse_reply(self.__request_property('_NET_WM_DESKTOP', window_id)))
+        self.__send_message('_NET_ACTIVE_WINDOW', [1, xproto.Time.CurrentTime, window_id], window_id)
+        self.connection.flush()
+
+    def switch(self, desktop_id):
+        self.__send_message('_NET_CURRENT_DESKTOP', [desktop_id, xproto.Time.CurrentTime])
+        self.connection.flush()
+
+    # woken by PropertyNotify of root (new or closed windows) or of watched windows (titles, desktops)
+    def wait_for_change(self, window_ids, timeout):
+        self.__watch_windows(window_ids)
+        changed = set()
+        if self.__drain_events(changed):
+            return changed
+        select([ self.connection.get_file_descriptor() ], [], [], timeout)
+        self.__drain_events(changed)
+        return changed
+
+    def __watch_windows(self, window_ids):
+        new_windows = set(window_ids) - self.watched_windows
+        new_windows = new_windows if self.watched_windows else new_windows | { self.root }
+        for window_id in new_windows:
+            self.stats['requests'] += 1
+            self.connection.core.ChangeWindowAttributes(window_id, xproto.CW.EventMask, [ xproto.EventMask.PropertyChange ])
+        self.watched_windows |= new_windows
+        self.connection.flush()
+
+    # changed - set, where ids of windows from received events are added
+    def __drain_events(self, changed):
+        received = False
+        while True:
+            try:
+                event = self.connection.poll_for_event()
+                if not event:
+                    return received
+                changed.add(event.window)
+            except xcffib.ProtocolException:
+                # watched window closed before ChangeWindowAttributes
+                pass
+            received = True
+
+    def __intern_atoms(self, names):
+        cookies = { name : self.connection.core.InternAtom(False, len(name), name) for name in names if name not in self.atoms }
+        self.stats['requests'] += len(cookies)
+        for name, cookie in cookies.items():
+            self.atoms[name] = cookie.reply().atom
+
+    def __get_atom(self, name):
+        name not in self.atoms and self.__intern_atoms([ name ])
+        return self.atoms[name]
+
+    def __request_property(self, atom_type, window_id = None):
+        self.stats['requests'] += 1
+        target = self.root if window_id is None else window_id
+        return self.connection.core.GetProperty(False, target, self.__get_atom(atom_type), xproto.GetPropertyType.Any, 0, self.MAX_PROPERTY_LENGTH)
+
+    def __parse_reply(self, cookie, single = True):
+        try:
+            reply = cookie.reply()
+        except xcffib.ProtocolException:
+            # window closed, while request was in flight
+            return None
+        if reply.format == 0:
+            return None
+        data = reply.value.buf()
+        if reply.format == 8:
+            return data.decode('utf-8', 'replace')
+        value = array('I')
+        value.frombytes(data)
+        return value[0] if single else value
+
+    def __parse_window_field(self, field, cookie):
+        value = self.__parse_reply(cookie)
+        if field in WindowsSnapshot.TYPECODES:
+            return WindowsSnapshot.UNDEFINED if value is None else int(value)
+        if field == 'wmClass':
+            return Utils.format_wm_class(value)
+        return '' if value is None else value
+
+    def __send_message(self, atom_type, data, window_id = None):
+        self.stats['requests'] += 1
+        self.invalidate_snapshots()
+        data = (data+[0]*(5-len(data)))[:5]
+        target = self.root if window_id is None else window_id
+        event = xproto.ClientMessageEvent.synthetic(format=32, window=target, type=self.__get_atom(atom_type),
+            data=xproto.ClientMessageData.synthetic(data, "I"*5))
+        mask = (xproto.EventMask.SubstructureRedirect | xproto.EventMask.SubstructureNotify)
+        self.connection.core.SendEvent(False, self.root, mask, event.pack())
+
 class WmctrlUtils(WindowsManager):
-    # <windowId> <desktopId> <pid> <client> <windowTitle>
-    def get_windows_list(self):
-        output_str = self.__execute_wmctrl(['-lp'])
-        regex_window_list = re.compile(r'(?P<windowId>0x[0-9A-Fa-f]{8})\s+(?P<desktopId>[0-9]+)\s+(?P<pid>[0-9]+)\s+(?P<client>[A-Za-z0-9]+)\s+(?P<windowTitle>.+)', re.MULTILINE)
-        return Utils.dict_from_regex(output_str, regex_window_list)
+    # single `wmctrl -lp` call returns all fields, so filters ordered only by compare cost
+    FIELDS_COST = { field : 0 for field in WindowsSnapshot.FIELDS }
+    OPERATIONS_COST = { operation : (0, 1) for operation in WindowsManager.OPERATIONS_COST }
+
+    @staticmethod
+    def load_dependencies():
+        if (not Utils.wmctrl_status()):
+            raise NotAvailableOperatioException("Seems, like `wmctrl` is not installed...")
+
+    # <windowId> <desktopId> <pid> <x> <y> <width> <height> <wmClass> <client> <windowTitle>
+    # single `wmctrl -lpGx` call returns all fields, so there is nothing to skip
+    # wmctrl don't show stacking order, so windows list order is used
+    def enumerate_windows(self):
+        self.stats['snapshots'] += 1
+        output_str = self.__execute_wmctrl(['-lpGx'])
+        regex_window_list = re.compile(r'(?P<windowId>0x[0-9A-Fa-f]{8})\s+(?P<desktopId>[0-9]+)\s+(?P<pid>[0-9]+)\s+(?P<x>-?[0-9]+)\s+(?P<y>-?[0-9]+)\s+(?P<width>[0-9]+)\s+(?P<height>[0-9]+)\s+(?P<wmClass>\S+)\s+(?P<client>[A-Za-z0-9]+)\s+(?P<windowTitle>.+)', re.MULTILINE)
+        snapshot = WindowsSnapshot()
+        for position, match in enumerate(regex_window_list.finditer(output_str)):
+            geometry = (int(match['x']), int(match['y']), int(match['width']), int(match['height']))
+            wm_class = '' if match['wmClass'] == 'N/A' else match['wmClass']
+            snapshot.append(int(match['windowId'], 16), int(match['desktopId']), int(match['pid']), match['client'], match['windowTitle'], wm_class, geometry, position)
+        snapshot.columns['recency'] = array(WindowsSnapshot.TYPECODES['recency'], self.recent_positions(snapshot.ids))
+        return snapshot
 
     # <desktopId> <active> <geometry> <viewport> <workAreaGeometry> <workAreaResolution> <title>
-    def get_desktops_list(self):
+    def enumerate_desktops(self):
+        self.stats['snapshots'] += 1
         output_str = self.__execute_wmctrl(['-d'])  
         regex_desktop_list = re.compile(r'(?P<desktopId>[0-9]+)\s+(?P<active>[-*]{1})\s+DG:\s+(?P<geometry>[0-9]{1,5}x[0-9]{1,5})\s+VP:\s+(?P<viewPort>N/A|(?:[0-9]{1,5}\,[0-9]{1,5}))\s+WA:\s+(?P<workAreaGeometry>[0-9]{1,5}\,[0-9]{1,5})\s+(?P<workAreaResolution>[0-9]{1,5}x[0-9]{1,5})\s+(?P<title>[\s\w/]+\n)', re.MULTILINE)
         return Utils.dict_from_regex(output_str, regex_desktop_list)
     
+    # `xrandr` is optional, without it whole desktop is single screen
+    def enumerate_monitors(self):
+        task = ['xrandr', '--listmonitors']
+        PrintUtil.log_debug(f"Executing xrandr task: {task}")
+        try:
+            p = self.spawn(task, stdout=PIPE, stderr=PIPE)
+        except OSError:
+            return []
+        try:
+            output, _ = p.communicate(timeout=deadlines.remaining())
+        except TimeoutExpired:
+            p.kill()
+            p.communicate()
+            deadlines.check()
+            raise
+        # ` 0: +*eDP-1 1920/344x1080/194+0+0  eDP-1`
+        regex_monitor = re.compile(r'(?P<width>[0-9]+)/[0-9]+x(?P<height>[0-9]+)/[0-9]+\+(?P<x>-?[0-9]+)\+(?P<y>-?[0-9]+)')
+        return [ (int(match['x']), int(match['y']), int(match['width']), int(match['height'])) for match in Utils.dict_from_regex(output.decode('utf-8'), regex_monitor) ]
+
     def __execute_wmctrl(self, task):
         task = ['wmctrl'] + task
         PrintUtil.log_debug(f"Executing wmctrl task: {task}")
-        p = Popen(task, stdin=PIPE, stdout=PIPE, stderr=PIPE)
-        output, err = p.communicate()
+        p = self.spawn(task, stdin=PIPE, stdout=PIPE, stderr=PIPE)
+        try:
+            output, err = p.communicate(timeout=deadlines.remaining())
+        except TimeoutExpired:
+            p.kill()
+            p.communicate()
+            deadlines.check()
+            raise
         rc = p.returncode
         if rc == 1:
             raise WmctrlExeption(f"Can't execute `wmctrl` command '{' '.join(task)}', exit code: `1`, error: {err.decode()}")
         return output.decode("utf-8")
     
     def mv_to(self, window_id, desktop_id):
-        command = ['-ir', window_id, '-t', desktop_id]
+        command = ['-ir', Utils.to_hex(window_id), '-t', str(desktop_id)]
+        self.__execute_wmctrl(command)
+
+    def move_resize(self, window_id, geometry):
+        command = ['-ir', Utils.to_hex(window_id), '-e', ','.join(str(value) for value in (0, *geometry))]
         self.__execute_wmctrl(command)
 
     def close(self, window_id):
-        command = ['-ic', window_id]
+        command = ['-ic', Utils.to_hex(window_id)]
         self.__execute_wmctrl(command)
     
     def switch(self, desktop_id):
-        command = ['-s' ,desktop_id]
+        command = ['-s' , str(desktop_id)]
         self.__execute_wmctrl(command)
     
     def active(self, window_id):
-        command = ['-ia', window_id]
+        command = ['-ia', Utils.to_hex(window_id)]
         self.__execute_wmctrl(command)
 
-windows_manager = WmctrlUtils() if options.use_wmctrl else XlibUtils()
+# <backend name> : <windows manager>
+WINDOWS_MANAGERS = {
+    'xlib' : XlibUtils,
+    'xcb' : XcbUtils,
+    'wmctrl' : WmctrlUtils
+}
+
+def create_windows_manager(backend):
+    manager_class = WINDOWS_MANAGERS[backend]
+    manager_class.load_dependencies()
+    manager = manager_class()
+    if options.snapshot_cache_ttl > 0:
+        manager.snapshot_cache = SnapshotCache(snapshot_cache_path, options.snapshot_cache_ttl)
+    return manager
+
+try:
+    windows_manager = create_windows_manager(options.backend)
+except NotAvailableOperatioException as ex:
+    PrintUtil.log_error(str(ex))
+    exit(1)
 PrintUtil.log_debug(f"Selected windows manger: {windows_manager}")
 
+# windows actions of executors, applied immediately or, in `--transactional` mode, buffered till commit
+# buffer keeps only last action for each window: last move wins, close cancels moves
+class ActionsBuffer:
+    CLOSE = 'close'
+
+    def __init__(self, buffered):
+        self.buffered = buffered
+        # <windowId> : <desktopId> | CLOSE
+        self.pending = {}
+        self.coalesced = 0
+        # windows in snapshot, from which windows to close were selected, for selectivity of filters()
+        self.windows_count = None
+
+    def mv_to(self, window_id, desktop_id):
+        if not self.buffered:
+            windows_manager.mv_to(window_id, desktop_id)
+            wait()
+            return
+        if window_id in self.pending:
+            self.coalesced += 1
+        # moving window, which would be closed, has no sense
+        if self.pending.get(window_id) != self.CLOSE:
+            self.pending[window_id] = desktop_id
+
+    def close(self, window_id):
+        if not self.buffered:
+            windows_manager.close(window_id)
+            wait()
+            return
+        if window_id in self.pending:
+            self.coalesced += 1
+        self.pending[window_id] = self.CLOSE
+        self.windows_count = windows_manager.snapshot_size or self.windows_count
+
+    # live windows readed with given fields, so commit, if pending moves change them
+    # windows, which would be closed, are excluded by filters() instead, so closes wait for scenario end
+    def before_read(self, fields, reason):
+        moves = any(action != self.CLOSE for action in self.pending.values())
+        if moves and 'desktopId' in fields:
+            self.commit(reason)
+
+    # filter for selecting live windows, drops windows, which would be closed on commit
+    def filters(self):
+        closed = frozenset(window_id for window_id, action in self.pending.items() if action == self.CLOSE)
+        if not closed:
+            return []
+        selectivity = max(1 - len(closed) / self.windows_count, 0) if self.windows_count else None
+        return [ FilterObject(DataFilters.filter_by_not_closed, closed, selectivity) ]
+
+    def commit(self, reason):
+        if not self.pending:
+            return
+        moves = [ (window_id, desktop_id, None) for window_id, desktop_id in self.pending.items() if desktop_id != self.CLOSE ]
+        closes = [ window_id for window_id, action in self.pending.items() if action == self.CLOSE ]
+        PrintUtil.log_debug(f"Commit before {reason}: {len(moves)} moves, {len(closes)} closes, {self.coalesced} actions coalesced")
+        self.pending, self.coalesced = {}, 0
+        windows_manager.place_windows(moves)
+        for window_id in closes:
+            windows_manager.close(window_id)
+        wait()
+
+actions_buffer = ActionsBuffer(options.transactional)
+
+# windows, selected by previous queries of scenario, reused while no mutating token was executed
+# key is normalized plan: filters in any order give same windows
+class SelectionCache:
+    def __init__(self):
+        # bumped by mutating tokens, selections of previous generations are dropped
+        self.generation = 0
+        self.selections = {}
+        self.hits, self.misses = 0, 0
+
+    @staticmethod
+    def plan(filters, range_object):
+        filters_plan = sorted((filter_object.field, DataFilters.NAMES[filter_object.filter_func], str(filter_object.filter_value)) for filter_object in filters)
+        return (tuple(filters_plan), range_object.limit, range_object.reverse, range_object.order_field, range_object.descending)
+
+    # select - returns windows on cache miss
+    def get(self, filters, range_object, select):
+        key = (self.generation, self.plan(filters, range_object))
+        if key in self.selections:
+            self.hits += 1
+            PrintUtil.log_debug(f"Selection cache hit for {range_object} {filters}, generation {self.generation} ({self.hits} hits, {self.misses} misses)")
+            return self.selections[key]
+        self.misses += 1
+        PrintUtil.log_debug(f"Selection cache miss for {range_object} {filters}, generation {self.generation} ({self.hits} hits, {self.misses} misses)")
+        self.selections[key] = select()
+        return self.selections[key]
+
+    def bump(self, reason):
+        self.generation += 1
+        self.selections = {}
+        PrintUtil.log_debug(f"Selection cache generation {self.generation} after {reason}")
+
+selection_cache = SelectionCache()
+
+# label of metrics, same for all queries of invocation
+def scenario_label():
+    if options.stdin:
+        return 'stdin'
+    if options.single_query:
+        return 'single-query'
+    if options.queries:
+        return 'queries'
+    if options.query_file:
+        return os.path.basename(options.query_file)
+    return options.scenario_name
+
+# nothing executed in `--explain` mode, so nothing to record
+metrics = MetricsRecorder(options.metrics_file if not options.explain else None, scenario_label())
+
+# time budgets of query and scenario, blocking tokens wait not longer than nearest deadline
+# budget is checked after each step too, so overrun of step is reported
+class Deadlines:
+    def __init__(self, query_budget, scenario_budget):
+        self.query_budget = query_budget
+        self.scenario_budget = scenario_budget
+        self.scenario_expires = monotonic() + scenario_budget if scenario_budget > 0 else None
+        self.query_expires = None
+        self.step, self.step_started = None, None
+
+    def start_query(self):
+        self.query_expires = monotonic() + self.query_budget if self.query_budget > 0 else None
+
+    def end_query(self):
+        self.query_expires = None
+
+    def start_step(self, step):
+        self.step, self.step_started = step, monotonic()
+
+    # (<expires>, <name>, <budget>) of nearest deadline or None
+    def nearest(self):
+        deadlines = [ (self.query_expires, 'query', self.query_budget), (self.scenario_expires, 'scenario', self.scenario_budget) ]
+        deadlines = [ deadline for deadline in deadlines if deadline[0] is not None ]
+        return min(deadlines) if deadlines else None
+
+    # None, if not limited
+    def remaining(self):
+        nearest = self.nearest()
+        return None if nearest is None else max(0, nearest[0] - monotonic())
+
+    # timeout of blocking call, cut by remaining budget
+    def limit(self, timeout):
+        remaining = self.remaining()
+        return timeout if remaining is None else min(timeout, remaining)
+
+    def check(self):
+        nearest = self.nearest()
+        if nearest is None:
+            return
+        expires, name, budget = nearest
+        now = monotonic()
+        if now >= expires:
+            raise DeadlineExceeded(f"{name.capitalize()} budget of {budget:g}s exceeded by {now - expires:.3f}s in '{self.step}' step, which took {now - self.step_started:.3f}s")
+
+    def sleep(self, seconds):
+        sleep(self.limit(seconds))
+        self.check()
+
+deadlines = Deadlines(options.query_timeout, options.scenario_timeout)
+
+# cut stream of matched windows positions, reverse - stream goes from the end of windows list
+class RangeObject:
+    def __init__(self, limit = None, reverse = False, order_field = None, descending = False):
+        self.limit = limit
+        self.reverse = reverse
+        self.order_field = order_field
+        self.descending = descending
+
+    # selection stops after limit, so windows after it are not fetched
+    def is_streaming(self):
+        return self.limit is not None and self.order_field is None
+
+    # positions in windows list order or in order of field
+    # presorted - stream is already in order of field, like after ordered()
+    def select(self, stream, snapshot = None, presorted = False):
+        if self.order_field is not None and not presorted:
+            return self.select_ordered(stream, snapshot)
+        selected = list(stream if self.limit is None else islice(stream, self.limit))
+        self.reverse and selected.reverse()
+        return selected
+
+    # heap keeps only limit windows, so it's O(N log k) instead of sorting all matched windows
+    # LAST takes from the end of ordered list, so it's the same as selecting first in opposite order
+    def select_ordered(self, stream, snapshot):
+        stream = list(stream)
+        snapshot.load([ self.order_field ], stream)
+        key = self.key(snapshot)
+        if self.limit is None:
+            return sorted(stream, key=key, reverse=self.descending)
+        largest = self.descending != self.reverse
+        selected = (heapq.nlargest if largest else heapq.nsmallest)(self.limit, stream, key=key)
+        self.reverse and selected.reverse()
+        return selected
+
+    # all positions in order, in which select_ordered() takes them
+    def ordered(self, snapshot, indexes):
+        snapshot.load([ self.order_field ])
+        return sorted(indexes, key=self.key(snapshot), reverse=self.descending != self.reverse)
+
+    def key(self, snapshot):
+        column = snapshot.columns[self.order_field]
+        # geometry of window can be unknown
+        if self.order_field == 'geometry':
+            return lambda index: column[index] or ()
+        # never focused windows are least recent
+        if self.order_field == 'recency':
+            return lambda index: sys.maxsize if column[index] == WindowsSnapshot.UNDEFINED else column[index]
+        return column.__getitem__
+
+    def __repr__(self):
+        return f"<RangeObject limit={self.limit} reverse={self.reverse} order_field={self.order_field} descending={self.descending}>"
+
+    def __str__(self):
+        if self.order_field == 'recency' and self.limit == 1 and not self.reverse and not self.descending:
+            return 'RECENT'
+        if self.limit is None:
+            selector = 'ALL'
+        elif self.limit == 1:
+            selector = 'LAST' if self.reverse else 'FIRST'
+        else:
+            selector = f"LAST LIMIT({self.limit})" if self.reverse else f"LIMIT({self.limit})"
+        order = f" ORDER BY({self.order_field}{',desc' if self.descending else ''})" if self.order_field else ''
+        return selector + order
+
 class RangeFilters:
-    filter_all = lambda arr: arr
-    filter_first = lambda arr : [ arr[0] ]
-    filter_last = lambda arr : [ arr[-1] ]
+    filter_all = RangeObject()
+    filter_first = RangeObject(1)
+    filter_last = RangeObject(1, True)
+    filter_recent = RangeObject(1, False, 'recency')
 
+# data filters compare single window value, FilterObject apply them to stream of windows
 class DataFilters:
-    filter_by_id = lambda windows_list, filter_value: [ window for window in windows_list if filter_value == window['windowId'] ]
-    filter_by_contains = lambda windows_list, filter_value: [ window for window in windows_list if filter_value in window['windowTitle'] ]
-    filter_by_regex = lambda windows_list, filter_value: [ window for window in windows_list if re.match(filter_value, window['windowTitle']) ] 
-    filter_by_full = lambda windows_list, filter_value: [ window for window in windows_list if filter_value ==  window['windowTitle'] ]
-    filter_by_desk =lambda windows_list, filter_value: [ window for window in windows_list if filter_value == window['desktopId'] ]
+    filter_by_id = lambda window_id, filter_value: filter_value == window_id
+    filter_by_contains = lambda title, filter_value: filter_value in title
+    filter_by_regex = lambda title, filter_value: re.match(filter_value, title) is not None
+    filter_by_full = lambda title, filter_value: filter_value == title
+    filter_by_desk = lambda desktop_id, filter_value: filter_value == desktop_id
+    # filter value is set of windows, which closing is buffered
+    filter_by_not_closed = lambda window_id, filter_value: window_id not in filter_value
+    # filter value is monitor or area rectangle, geometry of window can be unknown
+    filter_by_screen = lambda geometry, filter_value: geometry is not None and Utils.rect_contains(filter_value, *Utils.rect_center(geometry))
+    filter_by_area = lambda geometry, filter_value: geometry is not None and Utils.rects_overlap(geometry, filter_value)
+
+    # filter value is count of recently focused windows
+    filter_by_recent = lambda recency, filter_value: 0 <= recency < filter_value
+
+    # filters, which candidates taken from SpatialIndex
+    SPATIAL = [filter_by_screen, filter_by_area]
+
+    NAMES = {
+        filter_by_id : 'ID',
+        filter_by_contains : 'CONTAINS',
+        filter_by_regex : 'REGEX',
+        filter_by_full : 'FULL',
+        filter_by_desk : 'DESK',
+        filter_by_not_closed : 'NOT_CLOSED',
+        filter_by_screen : 'SCREEN',
+        filter_by_area : 'AREA',
+        filter_by_recent : 'RECENT'
+    }
+
+    # <filter> : (<window field>, <part of windows, which pass filter>, <cost of single compare>)
+    ESTIMATES = {
+        filter_by_id : ('windowId', 0.01, 0.1),
+        filter_by_contains : ('windowTitle', 0.3, 1),
+        filter_by_regex : ('windowTitle', 0.3, 3),
+        filter_by_full : ('windowTitle', 0.1, 0.5),
+        filter_by_desk : ('desktopId', 0.5, 0.1),
+        filter_by_not_closed : ('windowId', 0.9, 0.1),
+        filter_by_screen : ('geometry', 0.5, 0.2),
+        filter_by_area : ('geometry', 0.3, 0.2),
+        filter_by_recent : ('recency', 0.1, 0.1)
+    }
 
 class FilterObject:
-    def __init__(self, filter_func, filter_value):
+    def __init__(self, filter_func, filter_value, selectivity = None):
         self.filter_func = filter_func
         self.filter_value = filter_value
-
-    def filter(self, target_list):
-        result = self.filter_func(target_list, self.filter_value)
-        if len(result) == 0:
-            raise EmptyQueryResult("Zero result found for query..") 
-        return result
+        self.field, default_selectivity, self.cost = DataFilters.ESTIMATES[filter_func]
+        self.selectivity = default_selectivity if selectivity is None else selectivity
+
+    # cheap and selective filters have lower rank and should be applied first
+    def rank(self, fetch_cost):
+        return (fetch_cost + self.cost) / max(1 - self.selectivity, 0.01)
+
+    def __repr__(self):
+        return f"<FilterObject field={self.field} value={self.filter_value}>"
+
+    def __str__(self):
+        value = Utils.to_hex(self.filter_value) if self.filter_func == DataFilters.filter_by_id else self.filter_value
+        value = ','.join(str(part) for part in value) if self.is_spatial() else value
+        return f"BY {DataFilters.NAMES[self.filter_func]}({value})"
+
+    def is_spatial(self):
+        return self.filter_func in DataFilters.SPATIAL
+
+    # lazy, window value fetched only when previous stages pass window
+    def stream(self, snapshot, indexes):
+        if self.is_spatial() and snapshot.spatial_index is not None:
+            indexes = snapshot.spatial_index.candidates(snapshot, indexes, self)
+        return (index for index in indexes if self.filter_func(snapshot.value(self.field, index), self.filter_value))
+
+# windows grouped by monitors, which they overlap, region filters compare only windows from buckets of monitors, which region overlaps
+# windows are added, when they reach region filter, so geometry is fetched only for windows, passed cheaper filters,
+# and next region filters of scenario over same snapshot skip already indexed windows from other buckets without compare
+class SpatialIndex:
+    def __init__(self, monitors):
+        self.monitors = monitors
+        # last bucket is for windows outside of monitors or without geometry
+        self.buckets = [ set() for _ in range(0, len(monitors) + 1) ]
+        self.indexed = set()
+
+    def add(self, snapshot, index):
+        geometry = snapshot.value('geometry', index)
+        overlapped = [ number for number, monitor in enumerate(self.monitors) if geometry is not None and Utils.rects_overlap(monitor, geometry) ]
+        for number in overlapped or [ len(self.monitors) ]:
+            self.buckets[number].add(index)
+        self.indexed.add(index)
+
+    # buckets with all windows, which can pass filter, None if index can't help
+    def buckets_for(self, filter_object):
+        if filter_object.filter_func == DataFilters.filter_by_screen:
+            # center of window on monitor, so window overlaps it
+            if filter_object.filter_value not in self.monitors:
+                return None
+            return [ self.buckets[self.monitors.index(filter_object.filter_value)] ]
+        return [ self.buckets[-1] ] + [ self.buckets[number] for number, monitor in enumerate(self.monitors) if Utils.rects_overlap(monitor, filter_object.filter_value) ]
+
+    # positions of windows, which can pass filter, not indexed windows are added on the way
+    def candidates(self, snapshot, indexes, filter_object):
+        buckets = self.buckets_for(filter_object)
+        for index in indexes:
+            index in self.indexed or self.add(snapshot, index)
+            if buckets is None or any(index in bucket for bucket in buckets):
+                yield index
+
+    def __repr__(self):
+        return f"<SpatialIndex indexed={len(self.indexed)} buckets={[ len(bucket) for bucket in self.buckets ]}>"
 
 class Validators:
     @staticmethod
@@ -584,6 +2203,23 @@ class Validators:
         except ValueError:
             raise WrongQueryParameterException(f"Can't convert {id} to integer...")
 
+    # layout name is file name, so no paths
+    @staticmethod
+    def is_layout_name_valid(name):
+        reg = r"[\w.-]+"
+        return False if re.fullmatch(reg,name) is None or name in ['.', '..'] else True
+
+    @staticmethod
+    def is_screen_valid(id, monitors):
+        reg = r"[0-9]{1,3}"
+        return False if re.fullmatch(reg,id) is None else int(id) < len(monitors)
+
+    # x,y,width,height - position can be negative on multi-monitor setups, size can't be zero
+    @staticmethod
+    def is_area_valid(area):
+        reg = r"-?[0-9]{1,5},-?[0-9]{1,5},[1-9][0-9]{0,4},[1-9][0-9]{0,4}"
+        return False if re.fullmatch(reg,area.replace(' ', '')) is None else True
+
 class AppRunnersLoader:
     def __init__(self):
         self.app_runners_path = os.path.join(local_storage_path, "app_runners") 
@@ -610,8 +2246,150 @@ class AppRunnersLoader:
         except KeyError:
             raise WrongQueryParameterException(f"Can't find '{name}' runner in {self.app_runners_path}")
 
+    # alias of runner, which alias or executable named like window class, e.g. `firefox` for `Navigator.firefox`
+    def find_runner(self, wm_class):
+        names = { name.lower() for name in [ wm_class ] + wm_class.split('.') if name }
+        for alias, runner in self.__loaders.items():
+            if alias.lower() in names or os.path.basename(runner.split(' ')[0]).lower() in names:
+                return alias
+        return None
+
 app_runners = AppRunnersLoader() 
 
+# layout file line: <desktopId>::<wmClass>::<title regex>::<runner alias>::<x>,<y>,<width>,<height>
+# windows matched by class, title is used to choose between windows of same class
+class LayoutManager:
+    FIELDS = ['desktopId', 'wmClass', 'windowTitle', 'geometry']
+    DELIMETER = '::'
+
+    def __init__(self, name):
+        if not Validators.is_layout_name_valid(name):
+            raise WrongQueryParameterException(f"Not valid layout name `{name}`, use letters, digits, '.', '-' and '_'")
+        self.name = name
+        self.path = os.path.join(layouts_storage_path, name)
+
+    def snapshot(self):
+        return windows_manager.get_windows_list(self.FIELDS)
+
+    def save(self):
+        snapshot = self.snapshot()
+        lines = [ f"# {self.DELIMETER.join(['<desktopId>', '<wmClass>', '<title regex>', '<runner>', '<x>,<y>,<width>,<height>'])}" ]
+        for row in snapshot:
+            if not row.wm_class:
+                PrintUtil.log_debug(f"Skipping <{Utils.to_hex(row.window_id)}> window without WM_CLASS")
+                continue
+            runner = app_runners.find_runner(row.wm_class) or ''
+            geometry = ','.join(str(value) for value in row.geometry) if row.geometry else ''
+            lines.append(self.DELIMETER.join([ str(row.desktop_id), row.wm_class, re.escape(row.title.replace('\n', ' ')), runner, geometry ]))
+        try:
+            os.makedirs(layouts_storage_path, exist_ok=True)
+            # readers never see half written layout
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, 'w') as layout_file:
+                layout_file.write('\n'.join(lines) + '\n')
+            os.replace(temp_path, self.path)
+        except OSError as ex:
+            raise ExecuteQueryException(f"Can't write '{self.path}' layout: {ex}")
+        return len(lines) - 1
+
+    def load(self):
+        try:
+            lines = open(self.path).read().splitlines()
+        except FileNotFoundError:
+            raise WrongQueryParameterException(f"Can't find '{self.name}' layout in {layouts_storage_path}")
+        entries = list()
+        for index, line in enumerate(lines):
+            if not line.strip() or line.startswith('#'):
+                continue
+            try:
+                # title can contain delimeter, other parts can't
+                desktop_id, wm_class, rest = line.split(self.DELIMETER, 2)
+                title, runner, geometry = rest.rsplit(self.DELIMETER, 2)
+                entries.append({
+                    'desktopId' : int(desktop_id),
+                    'wmClass' : wm_class,
+                    'title' : re.compile(title),
+                    'runner' : runner,
+                    'geometry' : tuple(int(value) for value in geometry.split(',')) if geometry else None
+                })
+            except (ValueError, re.error) as ex:
+                raise ExecuteQueryException(f"Can't parse line {index + 1} of '{self.path}' layout: {ex}")
+        return entries
+
+    # [(<entry>, <snapshot index>)], unmatched entries; used indexes are not matched again
+    @staticmethod
+    def match(entries, snapshot, used = None):
+        used = set() if used is None else used
+        by_class = {}
+        for index, wm_class in enumerate(snapshot.column('wmClass')):
+            by_class.setdefault(wm_class, []).append(index)
+        matched = {}
+        # title matches first, so windows of same app keep their places
+        for by_title in [True, False]:
+            for position, entry in enumerate(entries):
+                candidates = (index for index in by_class.get(entry['wmClass'], []) if index not in used)
+                index = next((index for index in candidates if not by_title or entry['title'].search(snapshot.titles[index])), None) if position not in matched else None
+                if index is not None:
+                    matched[position] = index
+                    used.add(index)
+        return [ (entries[position], index) for position, index in sorted(matched.items()) ], [ entry for position, entry in enumerate(entries) if position not in matched ]
+
+    @staticmethod
+    def placement(entry, window_id):
+        return (window_id, entry['desktopId'], entry['geometry'])
+
+    # placements for windows, which are not on their places, entries, which should be launched and skipped ones
+    def plan(self):
+        entries = self.load()
+        snapshot = self.snapshot()
+        matched, missing = self.match(entries, snapshot)
+        placements = list()
+        for entry, index in matched:
+            row = snapshot[index]
+            geometry = entry['geometry'] if entry['geometry'] and entry['geometry'] != row.geometry else None
+            if entry['desktopId'] != row.desktop_id or geometry:
+                placements.append((row.window_id, entry['desktopId'], geometry))
+        launches = [ entry for entry in missing if entry['runner'] ]
+        skipped = [ entry for entry in missing if not entry['runner'] ]
+        PrintUtil.log_debug(f"Layout '{self.name}': {len(matched)} windows matched, {len(placements)} to place, {len(launches)} to launch, {len(skipped)} skipped")
+        return placements, launches, skipped
+
+    def restore(self):
+        placements, launches, skipped = self.plan()
+        for entry in skipped:
+            PrintUtil.log_warn(f"No window and runner for '{entry['wmClass']}' class, skipping")
+        windows_manager.place_windows(placements)
+        wait()
+        launches and self.launch(launches)
+        return len(placements)
+
+    # all apps started at once, windows placed as soon as they appear
+    def launch(self, entries):
+        previous_snapshot = windows_manager.get_windows_list([])
+        for entry in entries:
+            app_runner = app_runners.get_runner(entry['runner'])
+            PrintUtil.log_debug(f"Launching '{app_runner}' for '{entry['wmClass']}' window")
+            windows_manager.spawn(app_runner.split(' '), stdin=PIPE, stdout=PIPE, stderr=PIPE)
+        started = monotonic()
+        deadline = started + options.wait_process_timeout
+        while entries:
+            snapshot = windows_manager.get_windows_list([], cached=False)
+            added = SnapshotDiff(previous_snapshot, snapshot, []).added
+            if len(added) > 0:
+                matched, entries = self.match(entries, added)
+                for entry, _ in matched:
+                    metrics.observe('wizarddes_create_time_to_window_seconds', monotonic() - started, runner=entry['runner'])
+                windows_manager.place_windows([ self.placement(entry, added.ids[index]) for entry, index in matched ])
+                matched and wait()
+            remaining = deadlines.limit(deadline - monotonic())
+            if not entries or remaining <= 0:
+                break
+            windows_manager.wait_for_change(snapshot.ids, remaining)
+            previous_snapshot = snapshot
+        entries and deadlines.check()
+        for entry in entries:
+            PrintUtil.log_warn(f"Window of '{entry['runner']}' runner not found in {options.wait_process_timeout} seconds")
+
 class TokenExecutors:
     # range filters
     @staticmethod    
@@ -632,6 +2410,35 @@ class TokenExecutors:
         PrintUtil.log_debug(f"Executing 'LAST' token, append range_filter_processor as {state['range_filter_processor']}")
         return state
 
+    # most recently focused window, LIMIT after it takes more
+    @staticmethod
+    def recent_token_execute(state):
+        windows_manager.assert_focus_known('RECENT')
+        state['range_filter_processor'] = RangeFilters.filter_recent
+        PrintUtil.log_debug(f"Executing 'RECENT' token, append range_filter_processor as {state['range_filter_processor']}")
+        return state
+
+    # ORDER BY(<field>[,desc]), keeps limit of previous selector
+    @staticmethod
+    def order_by_token_execute(state):
+        field, _, direction = [ part.strip() for part in state['value'].partition(',') ]
+        if field not in WindowsSnapshot.FIELDS or direction not in ['', 'asc', 'desc']:
+            raise WrongQueryParameterException(f"Not valid `ORDER BY({state['value']})`, expected one of {', '.join(WindowsSnapshot.FIELDS)} fields and optional `asc` or `desc`")
+        current = state['range_filter_processor'] if 'range_filter_processor' in state else RangeFilters.filter_all
+        state['range_filter_processor'] = RangeObject(current.limit, current.reverse, field, direction == 'desc')
+        PrintUtil.log_debug(f"Executing 'ORDER BY' token, append range_filter_processor as {state['range_filter_processor']}")
+        return state
+
+    # LIMIT(<n>), with LAST takes windows from the end
+    @staticmethod
+    def limit_token_execute(state):
+        if not state['value'].isdigit() or int(state['value']) == 0:
+            raise WrongQueryParameterException(f"Not valid `LIMIT({state['value']})`, expected positive int")
+        current = state['range_filter_processor'] if 'range_filter_processor' in state else RangeFilters.filter_all
+        state['range_filter_processor'] = RangeObject(int(state['value']), current.reverse, current.order_field, current.descending)
+        PrintUtil.log_debug(f"Executing 'LIMIT' token, append range_filter_processor as {state['range_filter_processor']}")
+        return state
+
     # data filters
     @staticmethod
     def by_token_execute(state):
@@ -641,7 +2448,7 @@ class TokenExecutors:
     def id_token_execute(state):
         if (not Validators.is_window_id_valid(state['value'])): 
             raise WrongQueryParameterException(f"Not valid window id `{state['value']}` in `BY ID() filter`")
-        filter_object = FilterObject(DataFilters.filter_by_id, state['value'])
+        filter_object = FilterObject(DataFilters.filter_by_id, int(state['value'], 16))
         state['data_filter_processor'] += [ filter_object ]
         PrintUtil.log_debug(f"Executing 'ID' token, append data_filter_processor as {state['data_filter_processor']}")
         return state
@@ -661,11 +2468,43 @@ class TokenExecutors:
         state['value'] = current_desktop_id() if state['value'] == Tokens.DEFAULT_SCENARIO_TOKEN else state['value']
         if (not Validators.is_desktop_is_valid(state['value'])):
             raise WrongQueryParameterException(f"Not valid desktop id `{state['value']}` in `BY DESK() filter`")
-        filter_object = FilterObject(DataFilters.filter_by_desk, state['value'])
+        # windows usually spread between desktops
+        selectivity = 1 / max(len(state['desktopManager'].desktop_list), 1)
+        filter_object = FilterObject(DataFilters.filter_by_desk, int(state['value']), selectivity)
         state['data_filter_processor'] += [ filter_object ]
         PrintUtil.log_debug(f"Executing 'DESK' token, append data_filter_processor as {state['data_filter_processor']}")
         return state
 
+    @staticmethod
+    def screen_token_execute(state):
+        monitors = windows_manager.get_monitors()
+        if (not Validators.is_screen_valid(state['value'], monitors)):
+            raise WrongQueryParameterException(f"Not valid screen `{state['value']}` in `BY SCREEN() filter`, found {len(monitors)} screens")
+        filter_object = FilterObject(DataFilters.filter_by_screen, monitors[int(state['value'])], 1 / len(monitors))
+        state['data_filter_processor'] += [ filter_object ]
+        PrintUtil.log_debug(f"Executing 'SCREEN' token, append data_filter_processor as {state['data_filter_processor']}")
+        return state
+
+    @staticmethod
+    def area_token_execute(state):
+        if (not Validators.is_area_valid(state['value'])):
+            raise WrongQueryParameterException(f"Not valid area `{state['value']}` in `BY AREA() filter`, expected `x,y,width,height`")
+        filter_object = FilterObject(DataFilters.filter_by_area, tuple(int(value) for value in state['value'].split(',')))
+        state['data_filter_processor'] += [ filter_object ]
+        PrintUtil.log_debug(f"Executing 'AREA' token, append data_filter_processor as {state['data_filter_processor']}")
+        return state
+
+    @staticmethod
+    def by_recent_token_execute(state):
+        if re.fullmatch(r"[1-9][0-9]{0,2}", state['value']) is None:
+            raise WrongQueryParameterException(f"Not valid `BY RECENT({state['value']})`, expected positive int")
+        windows_manager.assert_focus_known('BY RECENT')
+        state = Utils.assert_filters_list(state)
+        filter_object = FilterObject(DataFilters.filter_by_recent, int(state['value']))
+        state['data_filter_processor'] += [ filter_object ]
+        PrintUtil.log_debug(f"Executing 'BY_RECENT' token, append data_filter_processor as {state['data_filter_processor']}")
+        return state
+
     @staticmethod
     def full_token_execute(state):
         filter_object = FilterObject(DataFilters.filter_by_full, state['value'])
@@ -683,7 +2522,7 @@ class TokenExecutors:
 
     # actions
     @staticmethod
-    def mvto_token_execute(state):
+    def mvto_target_desktop(state):
         def determine_dekstop_by_context():
             # select last desktop if value is DEFAULT_SCENARIO_TOKEN  and context is None
             current_last_desktop = str(len(state['desktopManager'].desktop_list)-1) 
@@ -694,13 +2533,21 @@ class TokenExecutors:
                     state['context']['mv_to_dekstop'] = current_last_desktop
                 return state['context']['mv_to_dekstop']
 
+        if state['value'] == Tokens.DEFAULT_SCENARIO_TOKEN:
+            # use context if multiple queries
+            return int(determine_dekstop_by_context())
+        value = state['value'].strip()
+        if re.fullmatch(r"[0-9]{1,4}", value) is None:
+            raise WrongQueryParameterException(f"Not valid `MV_TO({state['value']})`, expected desktop id as non-negative int or `{Tokens.DEFAULT_SCENARIO_TOKEN}`")
+        return int(value)
+
+    @staticmethod
+    def mvto_token_execute(state):
         PrintUtil.log_debug(f"Executing 'MV_TO' token, target list:")
         PrintUtil.log_debug_object(state['target_list'])
-        # use context if multiple queries
-        target_desktop = state['value'] if state['value'] != Tokens.DEFAULT_SCENARIO_TOKEN else determine_dekstop_by_context()
-        for window in state['target_list']:
-            windows_manager.mv_to(window['windowId'], target_desktop)
-            wait()
+        target_desktop = TokenExecutors.mvto_target_desktop(state)
+        for window_id in state['target_list'].ids:
+            actions_buffer.mv_to(window_id, target_desktop)
         return state
 
     @staticmethod
@@ -713,9 +2560,8 @@ class TokenExecutors:
     def close_token_execute(state):
         PrintUtil.log_debug(f"Executing 'CLOSE' token, target list:")
         PrintUtil.log_debug_object(state['target_list'])
-        for window in state['target_list']:
-            windows_manager.close(window['windowId'])
-            wait()
+        for window_id in state['target_list'].ids:
+            actions_buffer.close(window_id)
         return state
 
     @staticmethod
@@ -723,73 +2569,232 @@ class TokenExecutors:
         PrintUtil.log_debug(f"Executing 'SWITCH' token on desktop '{desktop_id}'")
         if (not Validators.is_desktop_is_valid(desktop_id)):
             raise WrongQueryParameterException(f"Not valid desktop id '{desktop_id}' in `SWITCH`, maybe desktop not yet created")
-        windows_manager.switch(desktop_id)
+        actions_buffer.commit('SWITCH')
+        windows_manager.switch(int(desktop_id))
+
+    @staticmethod
+    def save_layout_token_execute(name):
+        PrintUtil.log_debug(f"Executing 'SAVE_LAYOUT' token for '{name}' layout")
+        layout_manager = LayoutManager(name)
+        actions_buffer.commit('SAVE_LAYOUT')
+        windows_count = layout_manager.save()
+        PrintUtil.log_success(f"Saved {windows_count} windows to '{layout_manager.path}'")
+
+    @staticmethod
+    def restore_layout_token_execute(name):
+        PrintUtil.log_debug(f"Executing 'RESTORE_LAYOUT' token for '{name}' layout")
+        actions_buffer.commit('RESTORE_LAYOUT')
+        LayoutManager(name).restore()
 
     @staticmethod
     def wait_token_execute(state):
         try:
-            default_seconds = 5
-            seconds = default_seconds if state['value'] == Tokens.DEFAULT_SCENARIO_TOKEN or int(state['value']) < 0 else int(state['value'])
-            PrintUtil.log_debug(f"Executing 'WAIT' token for '{seconds}' seconds")
-            sleep(seconds)
+            seconds = TokenExecutors.wait_seconds(state)
         except ValueError:
             raise ExecuteQueryException(f"Can't convert 'WAIT' value to int")
-        finally:
-            return state
+        PrintUtil.log_debug(f"Executing 'WAIT' token for '{seconds}' seconds")
+        deadlines.sleep(seconds)
+        return state
+
+    # matched windows become target list, like after `->`
+    @staticmethod
+    def wait_for_token_execute(state):
+        expression, timeout = TokenExecutors.wait_for_condition(state)
+        filters_state = FiltersParser(expression).parse(state)
+        filters = filters_state['data_filter_processor']
+        range_object = filters_state['range_filter_processor'] if 'range_filter_processor' in filters_state else RangeFilters.filter_all
+        fields = [ field for field in WindowsSnapshot.FIELDS[1:] if field in { filter_object.field for filter_object in filters } ]
+        # window manager should see all changes, which are waited for
+        actions_buffer.commit('WAIT_FOR')
+        PrintUtil.log_debug(f"Executing 'WAIT_FOR' token, waiting up to '{timeout}' seconds for {filters} to {range_object}")
+        deadline = monotonic() + timeout
+        previous_snapshot = None
+        while True:
+            snapshot = windows_manager.get_windows_list(fields, cached=False)
+            diff = SnapshotDiff(previous_snapshot, snapshot, fields) if previous_snapshot is not None else None
+            # filtered fields of same windows are same, so result is same too
+            if diff is None or diff:
+                PrintUtil.log_debug(f"Checking {len(snapshot)} windows, changes: {diff}")
+                try:
+                    state['target_list'] = windows_manager.select_windows(snapshot, filters, range_object)
+                    PrintUtil.log_debug(f"After 'WAIT_FOR' target list is:")
+                    PrintUtil.log_debug_object(state['target_list'])
+                    return state
+                except EmptyQueryResult:
+                    pass
+            remaining = deadlines.limit(deadline - monotonic())
+            if remaining <= 0:
+                deadlines.check()
+                raise EmptyQueryResult(f"No windows matched `{expression}` in {timeout} seconds")
+            windows_manager.wait_for_change(snapshot.ids, remaining)
+            previous_snapshot = snapshot
+
+    # <filters>[, <timeout>], filters can contain commas too, like BY REGEX(\w{1,3})
+    @staticmethod
+    def wait_for_condition(state):
+        expression, _, timeout = state['value'].rpartition(',')
+        timeout = timeout.strip()
+        if not expression or not (timeout == Tokens.DEFAULT_SCENARIO_TOKEN or timeout.lstrip('-').isdigit()):
+            expression, timeout = state['value'], Tokens.DEFAULT_SCENARIO_TOKEN
+        return expression.strip(), TokenExecutors.wait_seconds({ 'value' : timeout })
+
+    @staticmethod
+    def wait_seconds(state):
+        default_seconds = 5
+        return default_seconds if state['value'] == Tokens.DEFAULT_SCENARIO_TOKEN or int(state['value']) < 0 else int(state['value'])
 
     @staticmethod
     def active_token_execute(state):
         target = state['target_list']
         if len(target) != 1:
             raise ExecuteQueryException(f"Can't set `ACTIVE` for {len(target)} windows, only single target...")
-        target = target[0]['windowId']
-        PrintUtil.log_debug(f"Executing 'ACTIVE' token, on <{target}> window")
-        if (not Validators.is_window_id_valid(target)):
-            raise WrongQueryParameterException(f"Not valid window id {target} for `ACTIVE`")
+        target = target.ids[0]
+        PrintUtil.log_debug(f"Executing 'ACTIVE' token, on <{Utils.to_hex(target)}> window")
+        actions_buffer.commit('ACTIVE')
         windows_manager.active(target)
+        recent_windows.touch(target)
         return state
     
     @staticmethod
     def print_token_execute(state):
         PrintUtil.log_debug(f"Executing 'PRINT' token")
-        target = state['target_list']
-        table_formater = PrintUtil.TableFormater(target)
-        table_formater.print_table()
+        actions_buffer.before_read(WindowsSnapshot.PRINTED_FIELDS, 'PRINT')
+        target = state['target_list'].to_dicts()
+        PrintUtil.print_rows(target)
         return state
 
     @staticmethod
     def print_desktops_token_execute(state):
         PrintUtil.log_debug(f"Executing 'PRINT_DESKTOPS' token")
         target = state['desktopManager'].desktop_list
-        table_formater = PrintUtil.TableFormater(target)
-        table_formater.print_table()
+        PrintUtil.print_rows(target)
         return state
 
+    @staticmethod
+    def count_token_execute(state):
+        PrintUtil.log_debug(f"Executing 'COUNT' token")
+        PrintUtil.print_rows([ { 'windows' : len(state['target_list']) } ])
+        return state
+
+    # single pass over column of target windows, desktops without windows counted too
+    @staticmethod
+    def group_by_token_execute(state):
+        field = state['value'].strip()
+        if field not in WindowsSnapshot.FIELDS:
+            raise WrongQueryParameterException(f"Not valid `GROUP_BY({field})`, expected one of {', '.join(WindowsSnapshot.FIELDS)} fields")
+        PrintUtil.log_debug(f"Executing 'GROUP_BY' token for '{field}' field")
+        actions_buffer.before_read([ field ], 'GROUP_BY')
+        counts = Counter(state['target_list'].column(field))
+        if field == 'desktopId':
+            for desktop in state['desktopManager'].desktop_list:
+                counts.setdefault(int(desktop['desktopId']), 0)
+        def format_value(value):
+            if field == 'windowId':
+                return Utils.to_hex(value)
+            if field == 'geometry':
+                return 'N/A' if value is None else ','.join(str(part) for part in value)
+            return 'N/A' if value == WindowsSnapshot.UNDEFINED else value
+        # undefined values are last
+        def sort_key(group):
+            undefined = group[0] is None or group[0] == WindowsSnapshot.UNDEFINED
+            return (undefined, () if undefined else group[0])
+        groups = sorted(counts.items(), key=sort_key)
+        PrintUtil.print_rows([ { field : format_value(value), 'windows' : count } for value, count in groups ])
+        return state
+
+    # selector and filters of query applied again after each windows change
+    # fields fetched only for added and changed windows, values of others taken from previous snapshot
+    @staticmethod
+    def print_live_token_execute(state):
+        PrintUtil.log_debug(f"Executing 'PRINT_LIVE' token")
+        actions_buffer.commit('PRINT_LIVE')
+        filters = state['data_filter_processor'] if 'data_filter_processor' in state else []
+        range_object = state['range_filter_processor'] if 'range_filter_processor' in state else RangeFilters.filter_all
+        previous, rows = WindowsSnapshot(), []
+        def read(changed_ids):
+            nonlocal previous, rows
+            # all windows watched, because any of them can start to match filters
+            snapshot = windows_manager.get_windows_list([], cached=False)
+            diff = SnapshotDiff(previous, snapshot, [])
+            PrintUtil.log_debug(f"Live windows changes: {diff}, changed windows: {'unknown' if changed_ids is None else len(changed_ids)}")
+            if changed_ids is not None and len(changed_ids) == 0 and not diff:
+                return rows, snapshot.ids
+            # removed windows are dropped, because snapshot has only current ones
+            if changed_ids is not None:
+                snapshot.reuse(previous, changed_ids)
+            try:
+                target_list = windows_manager.select_windows(snapshot, filters, range_object)
+            except EmptyQueryResult:
+                target_list = WindowsSnapshot()
+            # printed fields of target windows are loaded into snapshot too, so next read reuses them
+            previous, rows = snapshot, target_list.to_dicts()
+            return rows, snapshot.ids
+        TokenExecutors.live_table(read)
+        return state
+
+    @staticmethod
+    def print_desktops_live_token_execute(state):
+        PrintUtil.log_debug(f"Executing 'PRINT_DESKTOPS_LIVE' token")
+        TokenExecutors.live_table(lambda changed_ids: (windows_manager.get_desktops_list(cached=False), []))
+        return state
+
+    # read(<changed windows ids or None>) - returns rows of table and windows, which changes should be watched
+    # redrawn not more often than LIVE_REFRESH_INTERVAL, till Ctrl+C
+    @staticmethod
+    def live_table(read):
+        table = PrintUtil.LiveTable()
+        # nothing is known about windows before first read
+        changed_ids = None
+        try:
+            while True:
+                started = monotonic()
+                rows, window_ids = read(changed_ids)
+                table.update(rows)
+                changed_ids = windows_manager.wait_for_change(window_ids, deadlines.limit(5))
+                deadlines.sleep(max(0, started + LIVE_REFRESH_INTERVAL - monotonic()))
+        except KeyboardInterrupt:
+            print()
+
     @staticmethod
     def conversion_token_execute(state):
         PrintUtil.log_debug(f"Executing '->' token")
-        target_list = state['target_list'] if 'target_list' in state else windows_manager.get_windows_list()
-        PrintUtil.log_debug(f"Decided target list :")
+        filters = state['data_filter_processor'] if 'data_filter_processor' in state else []
+        PrintUtil.log_debug(f"Detected data filter: {filters}")
+        range_object = state['range_filter_processor'] if 'range_filter_processor' in state else RangeFilters.filter_all
+        PrintUtil.log_debug(f"Detected range filter: {range_object}")
+        try:
+            if 'target_list' in state:
+                target_list = windows_manager.select_windows(state['target_list'], filters, range_object)
+            else:
+                actions_buffer.before_read(state['required_fields'], 'selecting windows')
+                filters = filters + actions_buffer.filters()
+                # filters and range pushed down to windows manager, so fields fetched only for windows, which can be selected
+                target_list = selection_cache.get(filters, range_object, lambda: windows_manager.get_windows_list(state['required_fields'], filters, range_object))
+                target_list.load(state['required_fields'])
+        except EmptyQueryResult:
+            if not state.get('allow_empty'):
+                raise
+            target_list = WindowsSnapshot()
+        PrintUtil.log_debug(f"After filters target list is:")
         PrintUtil.log_debug_object(target_list)
-        if 'data_filter_processor' in state:
-            PrintUtil.log_debug(f"Detected data filter: {state['data_filter_processor']}")
-            for filter_object in state['data_filter_processor']:
-                target_list = filter_object.filter(target_list)
-            PrintUtil.log_debug(f"After data filter target list is:")
-            PrintUtil.log_debug_object(target_list)
-        if 'range_filter_processor' in state:
-            PrintUtil.log_debug(f"Detected range filter: {state['range_filter_processor']}")
-            target_list = state['range_filter_processor'](target_list)
-            PrintUtil.log_debug(f"After range filter target list is:")
-            PrintUtil.log_debug_object(target_list)
         state['target_list'] = target_list
         return state
     
+    # CREATE(<runner>[,<instances>]), returns runner alias and count of instances
+    @staticmethod
+    def create_arguments(value):
+        alias, _, count = [ part.strip() for part in value.partition(',') ]
+        if count and re.fullmatch(r"[1-9][0-9]{0,2}", count) is None:
+            raise WrongQueryParameterException(f"Not valid instances count `{count}` in `{value}`, expected positive int")
+        return alias, int(count) if count else 1
+
     @staticmethod
     def force_create_token_execute(state):
-        app_runner = app_runners.get_runner(state['value'])
-        PrintUtil.log_debug(f"Executing 'FORCE_CREATE' token, for '{app_runner}' runner")
-        Popen(app_runner.split(' '), stdin=PIPE, stdout=PIPE, stderr=PIPE)
+        alias, count = TokenExecutors.create_arguments(state['value'])
+        app_runner = app_runners.get_runner(alias)
+        PrintUtil.log_debug(f"Executing 'FORCE_CREATE' token, for '{app_runner}' runner, {count} instances")
+        for _ in range(0, count):
+            windows_manager.spawn(app_runner.split(' '), stdin=PIPE, stdout=PIPE, stderr=PIPE)
         return state
 
     @staticmethod
@@ -797,7 +2802,7 @@ class TokenExecutors:
         # timeout for long running processes
         def app_pids(app):
             # need check for fullpath executable, like /usr/bin/script-name and grep by last part (script-name)
-            ps_cux_output = check_output(["ps", "aux"]).decode().split('\n')
+            ps_cux_output = windows_manager.spawn(["ps", "aux"], stdout=PIPE).communicate()[0].decode().split('\n')
             # determine, if app runners is complex and contains global path 
             target_app = app.split(' ')[0]
             target_app = target_app.split('/')[-1]
@@ -805,16 +2810,17 @@ class TokenExecutors:
             if len(target_procs) == 0:
                 return []
             pid_regex = re.compile(r'[A-Za-z\.\_\-]+\s+(?P<pid>[0-9]{1,7})\s+', re.MULTILINE)
-            pids = [ m['pid'] for m in pid_regex.finditer("\n".join(target_procs)) ]
+            pids = [ int(m['pid']) for m in pid_regex.finditer("\n".join(target_procs)) ]
             return pids
 
-        app_runner = app_runners.get_runner(state['value'])
-        PrintUtil.log_debug(f"Executing 'CREATE' token, for '{app_runner}' runner")
+        alias, count = TokenExecutors.create_arguments(state['value'])
+        app_runner = app_runners.get_runner(alias)
+        PrintUtil.log_debug(f"Executing 'CREATE' token, for '{app_runner}' runner, {count} instances")
         
         # take last proc pid in list
-        windows_snapshot = windows_manager.get_windows_list()
-        windows_snapshot_count = len(windows_snapshot)
-        PrintUtil.log_debug(f"Taking windows snapshot, '{windows_snapshot_count}' windows found")
+        # only ids are compared, pid fetched just for new windows
+        windows_snapshot = windows_manager.get_windows_list([])
+        PrintUtil.log_debug(f"Taking windows snapshot, '{len(windows_snapshot)}' windows found")
         PrintUtil.log_debug_object(windows_snapshot)
         
         '''
@@ -822,42 +2828,54 @@ class TokenExecutors:
             So, for now using p.wait() for wait of ending of ui loading
             os.system(f"{app_runner} &")
         '''
-        p = Popen(app_runner.split(' '), stdin=PIPE, stdout=PIPE, stderr=PIPE)
-        try:
-            PrintUtil.log_debug(f"Wait timeout set to {options.wait_process_timeout}")
-            p.wait(timeout=options.wait_process_timeout)
-        except TimeoutExpired:
-            PrintUtil.log_warn(f"Process {app_runner} is still alive, well, lets try to catch him (or use 'FORCE_CREATE -> WAIT' query for singlethread processes)")
-        rc = p.returncode
-        if rc == 1:
+        started = monotonic()
+        # all instances started at once, so they are waited with single timeout
+        processes = [ windows_manager.spawn(app_runner.split(' '), stdin=PIPE, stdout=PIPE, stderr=PIPE) for _ in range(0, count) ]
+        PrintUtil.log_debug(f"Wait timeout set to {options.wait_process_timeout}")
+        wait_deadline = started + options.wait_process_timeout
+        for p in processes:
+            try:
+                p.wait(timeout=deadlines.limit(max(0, wait_deadline - monotonic())))
+            except TimeoutExpired:
+                deadlines.check()
+                PrintUtil.log_warn(f"Process {app_runner} is still alive, well, lets try to catch him (or use 'FORCE_CREATE -> WAIT' query for singlethread processes)")
+                break
+        if any(p.returncode == 1 for p in processes):
             raise ExecuteQueryException(f"Can't execute runner '{app_runner}', exit code: `1`")
 
-        current_windows = windows_manager.get_windows_list()
-        wait_lock = True
-        
-        pids = app_pids(app_runner)
+        pids = set(app_pids(app_runner))
         if (len(pids) == 0):
             raise ExecuteQueryException(f"Can't find PID for '{app_runner}, maybe process freezed and don't started'")
         PrintUtil.log_debug(f"{len(pids)} processes for '{app_runner}' runner found")
-        PrintUtil.log_debug_object(pids)
+        PrintUtil.log_debug_object(list(pids))
         # not sure about child pid. but for now it's work fine, maybe should try to obtain more info?
-        #pid = pids[0]
         PrintUtil.log_debug(f"Starting monitoring for the formation of '{app_runner}' window")
-        while wait_lock:
-            # wait for new windows opening
-            while windows_snapshot_count == len(current_windows):
-                current_windows = windows_manager.get_windows_list()
-                wait()
-            # check for target window   
-            intersect = [ window for window in current_windows if (window not in windows_snapshot) ]
-            for window in intersect:
-                if window['pid'] in pids:
-                    state['target_list'] = [ window ]
-                    wait_lock = False
-                    break
-            windows_snapshot = current_windows
-            windows_snapshot_count = len(windows_snapshot)
-        PrintUtil.log_debug(f"Target window for '{app_runner}' found")
+        # compare with snapshot taken before launch, so window opened while other closed is not missed
+        # checked again only after windows changed, not longer than process wait timeout
+        # windows of all instances are caught by same loop
+        detection_deadline = monotonic() + options.wait_process_timeout
+        detected = set()
+        while True:
+            snapshot = windows_manager.get_windows_list([], cached=False)
+            diff = SnapshotDiff(windows_snapshot, snapshot, [])
+            PrintUtil.log_debug(f"Snapshot diff: {diff}")
+            target_windows = [ window.index for window in diff.added if window.pid in pids ]
+            for index in target_windows:
+                if diff.added.ids[index] not in detected:
+                    detected.add(diff.added.ids[index])
+                    metrics.observe('wizarddes_create_time_to_window_seconds', monotonic() - started, runner=alias)
+            if len(target_windows) >= count:
+                break
+            remaining = deadlines.limit(detection_deadline - monotonic())
+            if remaining <= 0:
+                deadlines.check()
+                if not target_windows:
+                    raise ExecuteQueryException(f"Window of '{app_runner}' not found in {options.wait_process_timeout} seconds")
+                PrintUtil.log_warn(f"Only {len(target_windows)} of {count} windows of '{app_runner}' found in {options.wait_process_timeout} seconds")
+                break
+            windows_manager.wait_for_change(snapshot.ids, remaining)
+        state['target_list'] = diff.added.take(target_windows[:count])
+        PrintUtil.log_debug(f"Target windows for '{app_runner}' found")
         PrintUtil.log_debug_object(state['target_list'])
         return state
 
@@ -865,6 +2883,9 @@ EXECUTOR_FUNCS = {
     Tokens.ALL : TokenExecutors.all_token_execute,
     Tokens.FIRST : TokenExecutors.first_token_execute,
     Tokens.LAST : TokenExecutors.last_token_execute,
+    Tokens.ORDER_BY : TokenExecutors.order_by_token_execute,
+    Tokens.LIMIT : TokenExecutors.limit_token_execute,
+    Tokens.RECENT : TokenExecutors.recent_token_execute,
     Tokens.ID : TokenExecutors.id_token_execute,
     Tokens.CONTAINS: TokenExecutors.contains_token_execute,
     Tokens.FULL: TokenExecutors.full_token_execute,
@@ -875,13 +2896,208 @@ EXECUTOR_FUNCS = {
     Tokens.MV_TO: TokenExecutors.mvto_token_execute,
     Tokens.CLOSE: TokenExecutors.close_token_execute,
     Tokens.DESK: TokenExecutors.desk_token_execute,
+    Tokens.SCREEN: TokenExecutors.screen_token_execute,
+    Tokens.AREA: TokenExecutors.area_token_execute,
+    Tokens.BY_RECENT: TokenExecutors.by_recent_token_execute,
     Tokens.CONVERSION_OPERATOR: TokenExecutors.conversion_token_execute,
     Tokens.CREATE: TokenExecutors.create_token_execute,
     Tokens.WAIT: TokenExecutors.wait_token_execute,
+    Tokens.WAIT_FOR: TokenExecutors.wait_for_token_execute,
+    Tokens.SAVE_LAYOUT: TokenExecutors.save_layout_token_execute,
+    Tokens.RESTORE_LAYOUT: TokenExecutors.restore_layout_token_execute,
     Tokens.FORCE_CREATE: TokenExecutors.force_create_token_execute,
     Tokens.BY: TokenExecutors.by_token_execute,
     Tokens.PRINT: TokenExecutors.print_token_execute,
-    Tokens.PRINT_DESKTOPS: TokenExecutors.print_desktops_token_execute
+    Tokens.PRINT_DESKTOPS: TokenExecutors.print_desktops_token_execute,
+    Tokens.PRINT_LIVE: TokenExecutors.print_live_token_execute,
+    Tokens.COUNT: TokenExecutors.count_token_execute,
+    Tokens.GROUP_BY: TokenExecutors.group_by_token_execute,
+    Tokens.PRINT_DESKTOPS_LIVE: TokenExecutors.print_desktops_live_token_execute
+}
+
+# cost of tokens, which touch windows, estimated without execution
+class TokenEstimators:
+    # rough numbers, used only to compare queries
+    REQUEST_LATENCY = 0.0005
+    SPAWN_LATENCY = 0.005
+    # warn, when windows processed one by one in such amount
+    MANY_WINDOWS = 20
+
+    @staticmethod
+    def step(windows = 0, snapshots = 0, requests = 0, spawns = 0, waits = 0, sleep = 0):
+        return { 'windows' : windows, 'snapshots' : snapshots, 'requests' : requests, 'spawns' : spawns, 'waits' : waits, 'sleep' : sleep }
+
+    @staticmethod
+    def measured_step(before, windows = 0):
+        return TokenEstimators.step(windows, *[ windows_manager.stats[key] - before[key] for key in ['snapshots', 'requests', 'spawns'] ])
+
+    @staticmethod
+    def estimated_time(step):
+        return step['sleep'] + step['requests'] * TokenEstimators.REQUEST_LATENCY + step['spawns'] * TokenEstimators.SPAWN_LATENCY
+
+    # each window processed separately and followed by wait()
+    @staticmethod
+    def windows_actions_step(operation, windows):
+        requests, spawns = windows_manager.OPERATIONS_COST[operation]
+        if options.transactional:
+            # buffered, single wait on commit
+            return TokenEstimators.step(windows, 0, requests * windows, spawns * windows)
+        return TokenEstimators.step(windows, 0, requests * windows, spawns * windows, windows, windows * ACTION_DELAY)
+
+    @staticmethod
+    def targets_count(state):
+        # windows created by CREATE doesn't exist yet
+        if state.get('explain_created'):
+            return state['explain_created']
+        return len(state['target_list']) if 'target_list' in state else 0
+
+    # selection is read only, so it's really executed against current windows
+    @staticmethod
+    def conversion_token_explain(state):
+        if state.get('explain_created'):
+            return TokenEstimators.step(state['explain_created'])
+        before = dict(windows_manager.stats)
+        try:
+            state = TokenExecutors.conversion_token_execute(state)
+        except EmptyQueryResult:
+            state['target_list'] = WindowsSnapshot()
+        return TokenEstimators.measured_step(before, len(state['target_list']))
+
+    @staticmethod
+    def create_token_explain(state):
+        alias, count = TokenExecutors.create_arguments(state['value'])
+        app_runners.get_runner(alias)
+        state['explain_created'] = count
+        requests, spawns = windows_manager.OPERATIONS_COST['snapshot']
+        # snapshot before launch and at least one after, runners and `ps aux` processes, wait for processes end in worst case
+        return TokenEstimators.step(count, 2, requests * 2, spawns * 2 + count + 1, 0, options.wait_process_timeout)
+
+    @staticmethod
+    def force_create_token_explain(state):
+        alias, count = TokenExecutors.create_arguments(state['value'])
+        app_runners.get_runner(alias)
+        return TokenEstimators.step(spawns = count)
+
+    @staticmethod
+    def mvto_token_explain(state):
+        state['explain_note'] = f"to desktop {TokenExecutors.mvto_target_desktop(state)}"
+        return TokenEstimators.windows_actions_step('mv_to', TokenEstimators.targets_count(state))
+
+    @staticmethod
+    def mvseparate_token_explain(state):
+        return TokenEstimators.windows_actions_step('mv_to', TokenEstimators.targets_count(state))
+
+    @staticmethod
+    def close_token_explain(state):
+        return TokenEstimators.windows_actions_step('close', TokenEstimators.targets_count(state))
+
+    @staticmethod
+    def active_token_explain(state):
+        windows = TokenEstimators.targets_count(state)
+        windows != 1 and state.update({ 'explain_note' : f"would fail, {windows} windows selected" })
+        requests, spawns = windows_manager.OPERATIONS_COST['active']
+        return TokenEstimators.step(windows, 0, requests, spawns)
+
+    @staticmethod
+    def switch_token_explain(desktop_id):
+        requests, spawns = windows_manager.OPERATIONS_COST['switch']
+        # desktops list requested for validation
+        return TokenEstimators.step(0, 1, requests, spawns)
+
+    # windows fields fetched, file is not written
+    @staticmethod
+    def save_layout_token_explain(name):
+        before = dict(windows_manager.stats)
+        windows = len(LayoutManager(name).snapshot())
+        return TokenEstimators.measured_step(before, windows)
+
+    # plan is read only, so diff with live windows is real
+    @staticmethod
+    def restore_layout_token_explain(name):
+        before = dict(windows_manager.stats)
+        placements, launches, skipped = LayoutManager(name).plan()
+        step = TokenEstimators.measured_step(before, len(placements) + len(launches))
+        requests, spawns = windows_manager.OPERATIONS_COST['mv_to']
+        moves = len(placements) + len(launches)
+        resizes = sum(1 for placement in placements if placement[2]) + sum(1 for entry in launches if entry['geometry'])
+        resize_requests, resize_spawns = windows_manager.OPERATIONS_COST['move_resize']
+        step['requests'] += requests * moves + resize_requests * resizes
+        step['spawns'] += spawns * moves + resize_spawns * resizes + len(launches)
+        step['waits'] = 1 + (1 if launches else 0)
+        step['sleep'] = ACTION_DELAY * step['waits'] + (options.wait_process_timeout if launches else 0)
+        step['note'] = f"{len(placements)} to place, {len(launches)} to launch, {len(skipped)} skipped"
+        return step
+
+    @staticmethod
+    def wait_token_explain(state):
+        return TokenEstimators.step(sleep = TokenExecutors.wait_seconds(state))
+
+    # not loaded fields fetched by PRINT, one request per value
+    # condition checked once, if it's not matched now, whole timeout counted
+    @staticmethod
+    def wait_for_token_explain(state):
+        expression, timeout = TokenExecutors.wait_for_condition(state)
+        before = dict(windows_manager.stats)
+        try:
+            state['target_list'] = TokenExecutors.wait_for_token_execute(dict(state, value=f"{expression}, 0"))['target_list']
+            state['explain_note'] = "matched now"
+            return TokenEstimators.measured_step(before, len(state['target_list']))
+        except EmptyQueryResult:
+            state['target_list'] = WindowsSnapshot()
+            state['explain_note'] = f"not matched now, up to {timeout}s"
+            return dict(TokenEstimators.measured_step(before), sleep = timeout)
+
+    @staticmethod
+    def print_token_explain(state):
+        target_list = state['target_list'] if 'target_list' in state else WindowsSnapshot()
+        requests = sum(sum(flags) for flags in target_list.not_loaded.values())
+        return TokenEstimators.step(len(target_list), requests = requests)
+
+    @staticmethod
+    def print_desktops_token_explain(state):
+        return TokenEstimators.step()
+
+    @staticmethod
+    def count_token_explain(state):
+        target_list = state['target_list'] if 'target_list' in state else WindowsSnapshot()
+        return TokenEstimators.step(len(target_list))
+
+    # not loaded values of field fetched in one batch
+    @staticmethod
+    def group_by_token_explain(state):
+        target_list = state['target_list'] if 'target_list' in state else WindowsSnapshot()
+        flags = target_list.not_loaded.get(state['value'].strip())
+        return TokenEstimators.step(len(target_list), requests = sum(flags) if flags else 0)
+
+    @staticmethod
+    def print_live_token_explain(state):
+        state['explain_note'] = "redrawn on changes till Ctrl+C"
+        return TokenEstimators.print_token_explain(state)
+
+    @staticmethod
+    def print_desktops_live_token_explain(state):
+        state['explain_note'] = "redrawn on changes till Ctrl+C"
+        return TokenEstimators.step()
+
+EXPLAIN_FUNCS = {
+    Tokens.CONVERSION_OPERATOR: TokenEstimators.conversion_token_explain,
+    Tokens.CREATE: TokenEstimators.create_token_explain,
+    Tokens.FORCE_CREATE: TokenEstimators.force_create_token_explain,
+    Tokens.MV_TO: TokenEstimators.mvto_token_explain,
+    Tokens.MV_SEPARATE: TokenEstimators.mvseparate_token_explain,
+    Tokens.CLOSE: TokenEstimators.close_token_explain,
+    Tokens.ACTIVE: TokenEstimators.active_token_explain,
+    Tokens.SWITCH: TokenEstimators.switch_token_explain,
+    Tokens.WAIT: TokenEstimators.wait_token_explain,
+    Tokens.WAIT_FOR: TokenEstimators.wait_for_token_explain,
+    Tokens.SAVE_LAYOUT: TokenEstimators.save_layout_token_explain,
+    Tokens.RESTORE_LAYOUT: TokenEstimators.restore_layout_token_explain,
+    Tokens.PRINT: TokenEstimators.print_token_explain,
+    Tokens.PRINT_DESKTOPS: TokenEstimators.print_desktops_token_explain,
+    Tokens.PRINT_LIVE: TokenEstimators.print_live_token_explain,
+    Tokens.COUNT: TokenEstimators.count_token_explain,
+    Tokens.GROUP_BY: TokenEstimators.group_by_token_explain,
+    Tokens.PRINT_DESKTOPS_LIVE: TokenEstimators.print_desktops_live_token_explain
 }
 
 class DesktopManager:
@@ -896,9 +3112,8 @@ class DesktopManager:
 
     def distributeWindowsByRange(self, targets_list, ids_list):
         for index, desktop_id in enumerate(ids_list):
-            PrintUtil.log_debug(f"Moving window <{targets_list[index]['windowId']}> to {desktop_id}")
-            windows_manager.mv_to(targets_list[index]['windowId'], str(desktop_id))
-            wait()
+            PrintUtil.log_debug(f"Moving window <{Utils.to_hex(targets_list.ids[index])}> to {desktop_id}")
+            actions_buffer.mv_to(targets_list.ids[index], desktop_id)
 
     '''
         Available intervals syntax:
@@ -929,12 +3144,16 @@ class DesktopManager:
             return [i for i in range(from_id, to_id)]
 
 class QueryExecutor:
-    state = {}
-
     def __init__(self, tokens, query):
         self.query = query
         self.tokens = tokens
+        self.state = {}
+        self.state['required_fields'] = self.__required_fields()
+        self.state['allow_empty'] = any(Tokens.get(token) in Tokens.AGGREGATIONS for token in tokens)
+        PrintUtil.log_debug(f"Windows fields required by query: {self.state['required_fields']}")
+        stats_before = dict(windows_manager.stats)
         desktop_list = windows_manager.get_desktops_list()
+        self.prepare_step = TokenEstimators.measured_step(stats_before)
         PrintUtil.log_debug(f"Desktop list on moment, when query executor was created :")
         PrintUtil.log_debug_object(desktop_list)
         self.state['desktopManager'] = DesktopManager(desktop_list)
@@ -943,35 +3162,90 @@ class QueryExecutor:
         try:
             if context:
                 self.state['context'] = context
+            deadlines.start_query()
+            # scenario budget can be exceeded by previous queries
+            deadlines.start_step('query start')
+            deadlines.check()
 
             if (Tokens.is_unary(self.tokens[0])):
                 PrintUtil.log_debug(f"Detected unary token '{self.tokens[0]}' at postion '0'")
                 tokenType = Tokens.get(self.tokens[0])
+                deadlines.start_step(f"{self.tokens[0]}({self.tokens[1]})" if len(self.tokens) > 1 else self.tokens[0])
                 self.__execute_unary_operator(tokenType)
+                tokenType in Tokens.MUTATING and selection_cache.bump(self.tokens[0])
+                metrics.observe('wizarddes_token_duration_seconds', monotonic() - deadlines.step_started, token=self.tokens[0])
+                deadlines.check()
             else:
-                PrintUtil.log_debug(f"Strarting to process {len(self.tokens)} tokens")
-                iterator = range(0, len(self.tokens)).__iter__()
-                for i in iterator:
-                    token = self.tokens[i]
-                    if (Tokens.is_executable(token)):
-                        PrintUtil.log_debug(f"Processing executable token '{token}'")
-                        tokenType = Tokens.get(token)
-                        executor = EXECUTOR_FUNCS[tokenType]
-                        if (Tokens.contains_value(token)):
-                            PrintUtil.log_debug(f"'{token}' require parameter, checking...")
-                            try:
-                                self.state['value'] = self.tokens[i+1]
-                                PrintUtil.log_debug(f"Validating '{self.state['value']}' parameter")
-                                self.__is_valid_value(token, self.state['value'])
-                                iterator.__next__()
-                            except IndexError:
-                                raise WrongQueryParameterException(f"{token} token require value...")
-                        self.state = executor(self.state)
-                        PrintUtil.log_debug(f"After executing '{token}', executor state is:")
-                        PrintUtil.log_debug_object(self.state)
+                for token, tokenType in self.__executable_tokens():
+                    executor = EXECUTOR_FUNCS[tokenType]
+                    deadlines.start_step(f"{token}({self.state['value']})" if Tokens.contains_value(token) else token)
+                    self.state = executor(self.state)
+                    tokenType in Tokens.MUTATING and selection_cache.bump(token)
+                    metrics.observe('wizarddes_token_duration_seconds', monotonic() - deadlines.step_started, token=token)
+                    deadlines.check()
+                    PrintUtil.log_debug(f"After executing '{token}', executor state is:")
+                    PrintUtil.log_debug_object(self.state)
             return self.state['context'] if 'context' in self.state else None
         except KeyError: 
             raise ExecuteQueryException(f"Can't execute query {self.query}, it seems that no executor implemented")
+        finally:
+            deadlines.end_query()
+
+    # only read only tokens executed, cost of others estimated
+    # returns list of steps, first one is desktops list, requested on executor creation
+    def explain(self, context = None):
+        try:
+            if context:
+                self.state['context'] = context
+            steps = [ dict(self.prepare_step, step='prepare') ]
+            if (Tokens.is_unary(self.tokens[0])):
+                tokenType = Tokens.get(self.tokens[0])
+                steps.append(dict(EXPLAIN_FUNCS[tokenType](self.tokens[1]), step=f"{self.tokens[0]}({self.tokens[1]})"))
+                tokenType in Tokens.MUTATING and selection_cache.bump(self.tokens[0])
+                return steps
+            for token, tokenType in self.__executable_tokens():
+                if tokenType not in EXPLAIN_FUNCS:
+                    self.state = EXECUTOR_FUNCS[tokenType](self.state)
+                    continue
+                step = EXPLAIN_FUNCS[tokenType](self.state)
+                # not executed, but next queries should be estimated like after it
+                tokenType in Tokens.MUTATING and selection_cache.bump(token)
+                step['step'] = f"{token}({self.state['value']})" if Tokens.contains_value(token) else token
+                notes = [ self.state.pop('explain_note', '') ]
+                # windows processed one by one with delay after each
+                step['waits'] > TokenEstimators.MANY_WINDOWS and notes.append(f"{step['waits']} windows one by one")
+                step['note'] = ', '.join(note for note in notes if note)
+                steps.append(step)
+            return steps
+        except KeyError: 
+            raise ExecuteQueryException(f"Can't explain query {self.query}, it seems that no executor implemented")
+
+    # set 'value' in state for tokens with parameter and yield executable tokens
+    def __executable_tokens(self):
+        PrintUtil.log_debug(f"Strarting to process {len(self.tokens)} tokens")
+        iterator = range(0, len(self.tokens)).__iter__()
+        for i in iterator:
+            token = self.tokens[i]
+            if (Tokens.is_executable(token)):
+                PrintUtil.log_debug(f"Processing executable token '{token}'")
+                tokenType = Tokens.get(token)
+                if (Tokens.contains_value(token)):
+                    PrintUtil.log_debug(f"'{token}' require parameter, checking...")
+                    try:
+                        self.state['value'] = self.tokens[i+1]
+                        PrintUtil.log_debug(f"Validating '{self.state['value']}' parameter")
+                        self.__is_valid_value(token, self.state['value'])
+                        iterator.__next__()
+                    except IndexError:
+                        raise WrongQueryParameterException(f"{token} token require value...")
+                yield token, tokenType
+
+    # projection for windows snapshot, based on tokens, which read windows data
+    def __required_fields(self):
+        fields = set()
+        for token in self.tokens:
+            fields.update(Tokens.REQUIRED_FIELDS.get(Tokens.get(token), []))
+        return [ field for field in WindowsSnapshot.FIELDS if field in fields ]
 
     def __is_valid_value(self, token, value):
         if not Tokens.is_value_token(value):
@@ -986,27 +3260,60 @@ class QueryExecutor:
     
 class TokenParser:
     def __init__(self, expression):
+        # message of error, which stopped parsing or executing
+        self.error = None
         try:
             self.expression = expression
             self.tokens = self.tokens_list()
             self.simplified_tokens = self.simplify_tokens()
+            # executor reads desktops, so previous query step should not be blamed for scenario budget overrun
+            deadlines.start_step('query start')
+            deadlines.check()
             self.query_executor = QueryExecutor(self.simplified_tokens, self.expression)
-        except (ParseTokenException, WrongQueryParameterException, WmctrlExeption, EmptyQueryResult) as ex:
+        except (ParseTokenException, WrongQueryParameterException, WmctrlExeption, EmptyQueryResult, DeadlineExceeded) as ex:
+            self.error = str(ex)
             PrintUtil.log_error(f"Error occurring, while parsing tokens for `{self.expression}`:")
             PrintUtil.log_error(str(ex))
 
+    # context returned even after failure, so next queries still executed
     def execute(self, context = None):
         try:
-            try:
-                context = self.query_executor.execute(context)
-                PrintUtil.log_success(f"Successfully executed '{self.expression}' query")
-            except AttributeError:
+            context = self.query_executor.execute(context)
+            PrintUtil.log_success(f"Successfully executed '{self.expression}' query")
+        except AttributeError:
+            # parsing error is already reported
+            if self.error is None:
+                self.error = "Can't execute query, because bad token"
                 PrintUtil.log_error(f"Can't execute query, because bad token")
-            finally:
-                return context
-        except (WrongQueryParameterException, ExecuteQueryException, WmctrlExeption, EmptyQueryResult, NotAvailableOperatioException, TableFormaterException) as ex:
+        except (WrongQueryParameterException, ExecuteQueryException, WmctrlExeption, EmptyQueryResult, NotAvailableOperatioException, TableFormaterException, DeadlineExceeded) as ex:
+            self.error = str(ex)
             PrintUtil.log_error(f"Error occurring, while executing `{self.expression}`:")
             PrintUtil.log_error(str(ex))
+        return context
+
+    # <query> <status> <error> <windows> - target windows ids after executing
+    def result(self):
+        state = self.query_executor.state if hasattr(self, 'query_executor') else {}
+        target_list = state['target_list'] if 'target_list' in state else WindowsSnapshot()
+        return {
+            'query' : self.expression,
+            'status' : 'error' if self.error else 'ok',
+            'error' : self.error,
+            'windows' : [ Utils.to_hex(window_id) for window_id in target_list.ids ]
+        }
+
+    def explain(self, context = None):
+        try:
+            steps = self.query_executor.explain(context)
+            return steps, self.query_executor.state
+        except AttributeError:
+            self.error = self.error or "Can't explain query, because bad token"
+            PrintUtil.log_error(f"Can't explain query, because bad token")
+        except (WrongQueryParameterException, ExecuteQueryException, WmctrlExeption, EmptyQueryResult, NotAvailableOperatioException) as ex:
+            self.error = str(ex)
+            PrintUtil.log_error(f"Error occurring, while explaining `{self.expression}`:")
+            PrintUtil.log_error(str(ex))
+        return None, None
 
     def simplify_tokens(self):
         tokens_list = list()
@@ -1042,9 +3349,40 @@ class TokenParser:
         result = re.match(reg,token)
         return None if result is None else result['value']
 
+    # split by spaces outside of brackets, brackets can be nested, like in WAIT_FOR(BY DESK(2), 10)
+    # spaces inside of parentheses belong to token value, so filters can be nested, like in WAIT_FOR(FIRST BY DESK(2), 10)
+    # `\(` and `\)` are escaped and not counted, so regex can match parentheses, like in BY REGEX(Term.*\()
     def tokens_list(self):
-        delimeter = r"\s+(?![^\(\)]*\))"
-        return list(re.split(delimeter, self.expression))    
+        tokens, depth, escaped, closed = [ '' ], 0, False, False
+        for symbol in self.expression:
+            if symbol.isspace() and depth == 0:
+                tokens[-1] and tokens.append('')
+                closed = False
+                continue
+            if closed:
+                raise ParseTokenException(f"Unexpected `{symbol}` after `{tokens[-1]}`, tokens should be separated by spaces")
+            tokens[-1] += symbol
+            if escaped:
+                escaped = False
+            elif symbol == '\\':
+                escaped = True
+            elif symbol == '(':
+                depth += 1
+            elif symbol == ')':
+                if depth == 0:
+                    raise ParseTokenException(f"Unbalanced `)` in `{tokens[-1]}`, use `\\)` to match parenthesis")
+                depth -= 1
+                closed = depth == 0
+        if depth > 0:
+            raise ParseTokenException(f"Not closed `(` in `{tokens[-1]}`, use `\\(` to match parenthesis")
+        # `ORDER BY(field)` is written like in SQL, but it's single token
+        # `BY RECENT(int)` is filter, while `RECENT` without value is selector
+        for index in range(len(tokens) - 1, 0, -1):
+            if tokens[index - 1] == 'ORDER' and tokens[index].startswith('BY('):
+                tokens[index - 1:index + 1] = [ 'ORDER_' + tokens[index] ]
+            elif tokens[index - 1] == 'BY' and tokens[index].startswith('RECENT('):
+                tokens[index - 1:index + 1] = [ 'BY_' + tokens[index] ]
+        return tokens
 
     def is_token_with_value(self, token):
         # closing ? from {1}
@@ -1056,20 +3394,115 @@ class TokenParser:
             raise ParseTokenException(f"Bad token: {token}")
         return [ result['token'], result['tokenValue'] ]
 
+# filters part of query, passed as token value, like in WAIT_FOR(FIRST BY CONTAINS(Terminal) BY DESK(2), 10)
+class FiltersParser(TokenParser):
+    ALLOWED_TOKENS = Tokens.RANGE_FILTERS + Tokens.DATA_FILTERS + [Tokens.BY]
+
+    def __init__(self, expression):
+        self.expression = expression
+        self.tokens = self.tokens_list()
+        self.simplified_tokens = self.simplify_tokens()
+
+    # state with filters, like after executing query filters tokens
+    def parse(self, query_state):
+        state = { 'desktopManager' : query_state['desktopManager'], 'data_filter_processor' : [] }
+        iterator = iter(self.simplified_tokens)
+        for token in iterator:
+            tokenType = Tokens.get(token)
+            if tokenType not in self.ALLOWED_TOKENS or tokenType not in EXECUTOR_FUNCS:
+                raise WrongQueryParameterException(f"Only selectors and filters allowed in `{self.expression}`, but found `{token}`")
+            if Tokens.contains_value(token):
+                state['value'] = next(iterator, None)
+                if state['value'] is None or not Tokens.is_value_token(state['value']):
+                    raise WrongQueryParameterException(f"{token} token require value...")
+            state = EXECUTOR_FUNCS[tokenType](state)
+        if len(state['data_filter_processor']) == 0:
+            raise WrongQueryParameterException(f"At least one filter required in `{self.expression}`")
+        return state
+
 # main script
 
 def execute_single_query(query, context = None):
+    context, _ = execute_query(query, context)
+    return context
+
+# returns context and parser, which keeps result of query
+def execute_query(query, context = None):
     PrintUtil.log_info(f"Execute single query: {query}")
     context and PrintUtil.log_debug("Passed context: ")
     context and PrintUtil.log_debug_object(context)
     tokenizer = TokenParser(query)
-    return tokenizer.execute(context)
+    if options.explain:
+        return explain_single_query(tokenizer, query, context), tokenizer
+    context = tokenizer.execute(context)
+    windows_manager.store_snapshots()
+    recent_windows.store()
+    metrics.inc('wizarddes_queries_total', status='error' if tokenizer.error else 'ok')
+    windows_manager.snapshot_size is not None and metrics.observe('wizarddes_snapshot_windows', windows_manager.snapshot_size)
+    windows_manager.snapshot_size = None
+    windows_manager.monitors = None
+    return context, tokenizer
+
+def explain_single_query(tokenizer, query, context = None):
+    context = context if context else {'general_context' : True}
+    context.setdefault('explain', [])
+    steps, state = tokenizer.explain(context)
+    if not steps:
+        return context
+    range_object = state['range_filter_processor'] if 'range_filter_processor' in state else RangeFilters.filter_all
+    filters = windows_manager.order_filters(WindowsSnapshot.from_ids([], None), state['data_filter_processor'] if 'data_filter_processor' in state else [])
+    if not Tokens.is_unary(tokenizer.simplified_tokens[0]):
+        PrintUtil.log_indent(f"Selector: {range_object}")
+        PrintUtil.log_indent(f"Filters (in execution order): {', '.join(str(data_filter) for data_filter in filters) if filters else '-'}")
+    total = TokenEstimators.step()
+    rows = list()
+    for step in steps:
+        for key in total:
+            total[key] += step[key]
+        rows.append({ 'step' : step['step'], **{ key : step[key] for key in ['windows', 'snapshots', 'requests', 'spawns', 'waits'] }, 'sleep, s' : f"{step['sleep']:.2f}", 'note' : step.get('note', '') })
+    PrintUtil.TableFormater(rows).print_table()
+    estimated = TokenEstimators.estimated_time(total)
+    PrintUtil.log_info(f"Estimated time: {estimated:.3f}s ({total['requests']} requests, {total['spawns']} spawns, {total['sleep']:.2f}s sleeping)")
+    context['explain'].append({ 'query' : query, **{ key : total[key] for key in ['snapshots', 'requests', 'spawns', 'waits'] }, 'estimated, s' : f"{estimated:.3f}" })
+    return context
+
+def print_explain_summary(context):
+    if not context or not context.get('explain'):
+        return
+    summary = sorted(context['explain'], key=lambda query: float(query['estimated, s']), reverse=True)
+    PrintUtil.log_success(f"Explained {len(summary)} queries, most expensive first:")
+    PrintUtil.TableFormater(summary).print_table()
+    total = sum(float(query['estimated, s']) for query in summary)
+    PrintUtil.log_info(f"Estimated scenario time: {total:.3f}s")
 
 def execute_queries(queries):
     context = {'general_context' : True}
     queries_arr = queries.split(';;')
     for query in queries_arr:
         context = execute_single_query(query, context)
+    return context
+
+# each line executed as soon as it's readed, so producer don't need to close pipe
+def execute_queries_from_stdin():
+    context = {'general_context' : True}
+    for line in iter(sys.stdin.readline, ''):
+        # windows could be changed, while producer was preparing queries
+        selection_cache.bump('new input')
+        for query in [ query.strip() for query in line.split(';;') if query.strip() ]:
+            started = monotonic()
+            context, tokenizer = execute_query(query, context)
+            # producer expects, that windows are in place after result
+            actions_buffer.commit('query end')
+            result = tokenizer.result()
+            result['elapsed'] = round(monotonic() - started, 4)
+            try:
+                results_output.write(json.dumps(result) + '\n')
+                results_output.flush()
+                metrics.write()
+            except BrokenPipeError:
+                PrintUtil.log_debug("Results reader closed pipe, stopping")
+                return context
+    return context
 
 def parse_query_file(file_path):
     return open(file_path).read().splitlines()
@@ -1081,6 +3514,7 @@ def execute_rules_from_file(file_path):
         queries = parse_query_file(file_path)
         for query in queries:
             context = execute_single_query(query, context)
+        return context
     except FileNotFoundError:
         PrintUtil.log_error(f"Can't read '{file_path}' query file, check if it exist or have right permissions")
         exit(1)
@@ -1095,17 +3529,243 @@ def print_rules_list():
         PrintUtil.log_error(f"Can't list '{rules_storage_path}' directory, check if it exist or have right permissions")
         exit(1)
 
+# latency of backends on live display, to choose backend and action delay for window manager
+class Benchmark:
+    PERCENTILES = [50, 90, 99]
+    # time, after which not applied action is counted as failed
+    SETTLE_TIMEOUT = 2
+
+    def __init__(self, backend, manager, rounds):
+        self.backend = backend
+        self.manager = manager
+        self.rounds = rounds
+        # seconds between sent action and its result, 0 if first read already returns it
+        self.settle_times = list()
+        self.rows = list()
+
+    def run(self):
+        rows = self.rows
+        rows.append(self.measure('get_windows_list', lambda: self.manager.get_windows_list(cached=False)))
+        rows.append(self.measure('get_desktops_list', lambda: self.manager.get_desktops_list(cached=False)))
+        desktops_count = len(self.manager.get_desktops_list(cached=False))
+        snapshot = self.manager.get_windows_list(['desktopId'], cached=False)
+        window = self.movable_window(snapshot, desktops_count)
+        if desktops_count < 2 or window is None:
+            PrintUtil.log_warn(f"At least 2 desktops and 1 normal not sticky window required to measure actions of '{self.backend}' backend")
+            return
+        window_id, desktop_id = window
+        current_desktop = self.current_desktop()
+        PrintUtil.log_info(f"Moving <{Utils.to_hex(window_id)}> window and switching desktop with '{self.backend}' backend")
+        try:
+            rows.append(self.measure('mv_to round trip', lambda: self.round_trip(
+                lambda target: self.manager.mv_to(window_id, target), lambda: self.window_desktop(window_id), desktop_id, desktops_count)))
+            rows.append(self.measure('switch round trip', lambda: self.round_trip(
+                self.manager.switch, self.current_desktop, current_desktop, desktops_count)))
+        finally:
+            try:
+                self.manager.mv_to(window_id, desktop_id)
+            finally:
+                self.manager.switch(current_desktop)
+        rows.append(self.timings_row('action settle', self.settle_times))
+
+    # (<windowId>, <desktopId>) of first window on single desktop, sticky (all desktops) and desktop or dock windows are skipped
+    def movable_window(self, snapshot, desktops_count):
+        desktops = snapshot.column('desktopId')
+        for index, window_id in enumerate(snapshot.ids):
+            if 0 <= desktops[index] < desktops_count and not self.manager.is_special_window(window_id):
+                return window_id, desktops[index]
+        return None
+
+    def measure(self, operation, func):
+        timings = list()
+        for _ in range(0, self.rounds):
+            started = monotonic()
+            func()
+            timings.append(monotonic() - started)
+        return self.timings_row(operation, timings)
+
+    def timings_row(self, operation, timings):
+        timings = sorted(timings)
+        row = { 'backend' : self.backend, 'operation' : operation }
+        for percentile in self.PERCENTILES:
+            row[f"p{percentile}, ms"] = f"{Benchmark.percentile(timings, percentile) * 1000:.2f}"
+        row['max, ms'] = f"{timings[-1] * 1000:.2f}"
+        return row
+
+    # nearest rank
+    @staticmethod
+    def percentile(timings, percentile):
+        return timings[max(0, -(-len(timings) * percentile // 100) - 1)]
+
+    # move to next desktop and back, each time till result is visible
+    def round_trip(self, action, read, initial, desktops_count):
+        for target in [ (initial + 1) % desktops_count, initial ]:
+            action(target)
+            started = monotonic()
+            if read() == target:
+                self.settle_times.append(0)
+                continue
+            while read() != target:
+                if monotonic() - started > self.SETTLE_TIMEOUT:
+                    raise ExecuteQueryException(f"Action of '{self.backend}' backend not applied in {self.SETTLE_TIMEOUT} seconds")
+                sleep(0.001)
+            self.settle_times.append(monotonic() - started)
+
+    def window_desktop(self, window_id):
+        snapshot = self.manager.get_windows_list(['desktopId'], [ FilterObject(DataFilters.filter_by_id, window_id) ], cached=False)
+        return snapshot.column('desktopId')[0] if len(snapshot) else None
+
+    def current_desktop(self):
+        return next(desktop['desktopId'] for desktop in self.manager.get_desktops_list(cached=False) if desktop['active'] == '*')
+
+    @staticmethod
+    def suggest(benchmarks):
+        measured = [ benchmark for benchmark in benchmarks if benchmark.settle_times ]
+        for benchmark in measured:
+            settle_time = Benchmark.percentile(sorted(benchmark.settle_times), 99)
+            # ceil to 10 ms, with some margin
+            delay = 0 if settle_time == 0 else -(-settle_time * 1.5 // 0.01) * 0.01
+            reason = "actions applied before next read" if delay == 0 else f"p99 of action settle is {settle_time * 1000:.1f} ms"
+            PrintUtil.log_success(f"'{benchmark.backend}': use `--action-delay {delay:g}` ({reason}, current is {ACTION_DELAY:g})")
+        if benchmarks:
+            fastest = min(benchmarks, key=lambda benchmark: float(benchmark.rows[0]['p50, ms']))
+            PrintUtil.log_success(f"Fastest windows list with '{fastest.backend}' backend, use `--backend {fastest.backend}`")
+
+def run_benchmark(rounds):
+    benchmarks = list()
+    results = list()
+    for backend in WINDOWS_MANAGERS:
+        try:
+            benchmark = Benchmark(backend, create_windows_manager(backend), rounds)
+        except NotAvailableOperatioException as ex:
+            PrintUtil.log_warn(f"Skipping '{backend}' backend: {ex}")
+            continue
+        PrintUtil.log_info(f"Measuring '{backend}' backend, {rounds} rounds")
+        try:
+            benchmark.run()
+        except (ExecuteQueryException, NotAvailableOperatioException, WmctrlExeption) as ex:
+            PrintUtil.log_error(f"Can't measure '{backend}' backend: {ex}")
+            continue
+        benchmarks.append(benchmark)
+        results += benchmark.rows
+    results and PrintUtil.TableFormater(results).print_table()
+    Benchmark.suggest(benchmarks)
+
+# hotkeys are often pressed few times in a row, so same scenario is requested again, while first run is in flight
+# runs of scenario are serialized with lock, request within debounce window after start of previous run is coalesced with it:
+# joined, if previous run is in flight (waits for its end), or dropped, if it's already finished
+class InvocationCoalescer:
+    def __init__(self, debounce):
+        self.debounce = debounce
+        # queries passed in arguments have no name, so text of them is the key
+        key = options.single_query or options.queries or (os.path.abspath(options.query_file) if options.query_file else options.scenario_name)
+        self.path = os.path.join(runs_storage_path, f"{hashlib.sha1(key.encode()).hexdigest()}.lock")
+        self.lock_file = None
+
+    # False, if scenario should not be executed by this invocation
+    def acquire(self):
+        if self.debounce <= 0:
+            return True
+        requested = time()
+        os.makedirs(runs_storage_path, exist_ok=True)
+        self.lock_file = open(self.path, 'a+')
+        joined = False
+        try:
+            fcntl.flock(self.lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            PrintUtil.log_debug(f"Run of '{scenario_label()}' is in flight, waiting for its end")
+            fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+            joined = True
+        # start time of previous run, written under lock
+        self.lock_file.seek(0)
+        try:
+            previous = float(self.lock_file.read())
+        except ValueError:
+            previous = None
+        if previous is not None and requested - previous < self.debounce:
+            mode = 'joined' if joined else 'dropped'
+            PrintUtil.log_info(f"Run of '{scenario_label()}' {mode}: previous one started {(requested - previous) * 1000:.0f} ms before, debounce is {self.debounce:g} s")
+            metrics.inc('wizarddes_coalesced_runs_total', mode=mode)
+            self.release()
+            return False
+        self.lock_file.seek(0)
+        self.lock_file.truncate()
+        self.lock_file.write(str(time()))
+        self.lock_file.flush()
+        return True
+
+    def release(self):
+        if self.lock_file is not None:
+            # lock released with file
+            self.lock_file.close()
+            self.lock_file = None
+
+# focus changes are X events, so index is updated without polling
+def watch_recent_windows():
+    PrintUtil.log_info(f"Watching focus changes for '{recent_windows.path}', press Ctrl+C to stop")
+    active = None
+    try:
+        windows_manager.active_window()
+        while True:
+            current = windows_manager.active_window()
+            if current is not None and current != active:
+                PrintUtil.log_debug(f"Window <{Utils.to_hex(current)}> focused")
+                recent_windows.touch(current)
+                # closed windows are dropped, so index keeps only windows, which can be selected
+                recent_windows.store(windows_manager.get_windows_list([], cached=False).ids)
+                active = current
+            windows_manager.wait_for_change([], 60)
+    except NotAvailableOperatioException as ex:
+        PrintUtil.log_error(f"Can't watch focus changes with '{options.backend}' backend: {ex}")
+    except KeyboardInterrupt:
+        print()
+
 def main():
+    context = None
+    started = monotonic()
+    service_mode = options.rules_list or options.bench is not None or options.watch_recent
+    # nothing changed by these modes, so nothing to coalesce
+    coalescer = InvocationCoalescer(0 if service_mode or options.stdin or options.explain else options.debounce)
+    if not coalescer.acquire():
+        metrics.write()
+        return
+    try:
+        context = execute_main_mode()
+    finally:
+        commit_scenario_actions()
+        coalescer.release()
+    if not service_mode:
+        metrics.observe('wizarddes_scenario_duration_seconds', monotonic() - started)
+        metrics.write()
+    options.explain and print_explain_summary(context)
+
+def execute_main_mode():
+    context = None
     if options.rules_list:
         print_rules_list()
+    elif options.bench is not None:
+        run_benchmark(options.bench)
+    elif options.watch_recent:
+        watch_recent_windows()
+    elif options.stdin:
+        context = execute_queries_from_stdin()
     elif options.single_query:
-        execute_single_query(options.single_query)
+        context = execute_single_query(options.single_query)
     elif options.queries:
-        execute_queries(options.queries)
+        context = execute_queries(options.queries)
     elif options.query_file:
-        execute_rules_from_file(options.query_file)
+        context = execute_rules_from_file(options.query_file)
     else:
-        execute_rules_from_file(os.path.join(rules_storage_path, options.scenario_name))
+        context = execute_rules_from_file(os.path.join(rules_storage_path, options.scenario_name))
+    return context
+
+# actions of aborted scenario are applied too, like they would be without buffering
+def commit_scenario_actions():
+    try:
+        actions_buffer.commit('scenario end')
+    except (WmctrlExeption, NotAvailableOperatioException, DeadlineExceeded) as ex:
+        PrintUtil.log_error(f"Error occurring, while applying buffered actions at scenario end:")
+        PrintUtil.log_error(str(ex))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file